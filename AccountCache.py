@@ -0,0 +1,72 @@
+import threading
+import time
+from apis.bitget_client import BitgetClient
+from logger import Logger
+
+
+class AccountCache:
+    """
+    Process-wide account balances shared by all OrderManagers.
+    Kept current by the private websocket account channel; a balance older than
+    `ttl` seconds is refreshed once over REST, concurrent callers wait for that
+    single refresh instead of sending their own.
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    TTL = 30
+
+    def __new__(cls, api: BitgetClient = None, ttl=TTL):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super().__new__(cls)
+                cls._instance.api = api
+                cls._instance.ttl = ttl
+                cls._instance.balances = {}
+                cls._instance.refresh_lock = threading.Lock()
+                cls._instance.log = Logger('AccountCache')
+            elif api is not None and cls._instance.api is None:
+                cls._instance.api = api
+            return cls._instance
+
+    def update(self, margin_coin, available, source):
+        self.balances[margin_coin] = (float(available), time.monotonic())
+        self.log.logger.debug(f'{margin_coin} available {available} ({source})')
+
+    def on_account(self, accounts):
+        # Websocket account channel push, one entry per margin coin
+        for account in accounts:
+            if account.get('marginCoin') is not None and account.get('available') is not None:
+                self.update(account['marginCoin'], account['available'], 'ws')
+
+    def _fresh(self, margin_coin):
+        entry = self.balances.get(margin_coin)
+        if entry is not None and time.monotonic() - entry[1] < self.ttl:
+            return entry[0]
+        return None
+
+    def refresh(self, symbol, margin_coin='USDT'):
+        response = self.api.account(dict(symbol=symbol, productType='USDT-FUTURES', marginCoin=margin_coin))
+        if response and 'data' in response:
+            self.update(margin_coin, response['data']['available'], 'rest')
+        else:
+            self.log.logger.error(f'Unexpected response format: {response}')
+
+    def get_available(self, symbol, margin_coin='USDT'):
+        available = self._fresh(margin_coin)
+        if available is not None:
+            return available
+
+        with self.refresh_lock:
+            # Another thread may have refreshed while we were waiting
+            available = self._fresh(margin_coin)
+            if available is not None:
+                return available
+            try:
+                self.refresh(symbol, margin_coin)
+            except Exception as e:
+                self.log.logger.error(f'Error getting account details: {e}')
+
+        # Stale value rather than nothing if the refresh failed
+        entry = self.balances.get(margin_coin)
+        return entry[0] if entry is not None else None
@@ -0,0 +1,167 @@
+import argparse
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from apis.bitget_client import BitgetClient
+from apis.bitget_c.exceptions import BitgetAPIException
+from apis.bitget_c.pagination import CANDLES_PAGE, HISTORY_CANDLES_PAGE
+from CandleCache import CandleCache
+from models.candle_builder import granularity_ms, rest_granularity, floor_time, ms_to_datetime
+from logger import Logger
+
+DAY_MS = 24 * 60 * 60 * 1000
+
+
+class CandleBackfill:
+    """
+    Concurrent download of closed candles into the CandleCache, any granularity.
+    The range is cut in windows of one page each, fetched by a bounded pool of
+    workers and written in time order as they complete, so memory holds at most
+    `workers * 2` pages. The recent part uses the candles endpoint (1000 rows per
+    request), older windows the history-candles endpoint (200 rows).
+    Requests are paced by the client rate limiter and bypass the request cache,
+    a 429 or a failed request is retried with exponential backoff.
+    Candles after the cached ones are appended; a range before the first cached
+    candle is merged into the cache once downloaded.
+    """
+
+    WORKERS = 8
+    RETRIES = 5
+    BACKOFF = 1.0
+    # How far back the candles endpoint serves data, older windows use history-candles
+    CANDLES_LOOKBACK_MS = 30 * DAY_MS
+
+    def __init__(self, api: BitgetClient, cache: CandleCache, workers=WORKERS):
+        self.api = api
+        self.cache = cache
+        self.workers = workers
+        self.requests = 0
+        self.retries = 0
+        self.written = 0
+        self.counters_lock = threading.Lock()
+        self.log = Logger('CandleBackfill')
+
+    def windows(self, start_ms, end_ms, length):
+        # (start, end, history) windows of one page covering [start_ms, end_ms)
+        recent = self.api.now_ms() - self.CANDLES_LOOKBACK_MS
+        start = start_ms
+        while start < end_ms:
+            history = start < recent
+            page = HISTORY_CANDLES_PAGE if history else CANDLES_PAGE
+            end = min(start + page * length, end_ms)
+            yield start, end, history
+            start = end
+
+    def fetch_window(self, symbol, granularity, window):
+        # Candle rows (time, open, high, low, close, volume, quote volume) opened in the window, sorted
+        start, end, history = window
+        length = granularity_ms(granularity)
+        params = {
+            "symbol": symbol,
+            "productType": "USDT-FUTURES",
+            "granularity": rest_granularity(granularity),
+            "startTime": str(start),
+            "endTime": str(end - 1),
+            "limit": str((end - start) // length),
+        }
+        request = self.api.historyCandles if history else self.api.candles
+        delay = self.BACKOFF
+        for attempt in range(self.RETRIES + 1):
+            try:
+                with self.counters_lock:
+                    self.requests += 1
+                rows = np.array(request(params, cache=False)['data'], dtype=float).reshape(-1, 7)
+                break
+            except Exception as e:
+                if attempt == self.RETRIES:
+                    raise
+                with self.counters_lock:
+                    self.retries += 1
+                if not (isinstance(e, BitgetAPIException) and e.status_code == 429):
+                    self.log.logger.error(f'{symbol} {ms_to_datetime(start)} retry {attempt + 1}: {e}')
+                time.sleep(delay)
+                delay *= 2
+
+        rows = rows[(rows[:, 0] >= start) & (rows[:, 0] < end)]
+        _, index = np.unique(rows[:, 0], return_index=True)
+        return rows[index]
+
+    def jobs(self, symbols, granularity, start_ms, end_ms):
+        # (symbol, window, mode, last of its range) in the order the results are written
+        length = granularity_ms(granularity)
+        for symbol in symbols:
+            first = self.cache.first_time(symbol, granularity)
+            last = self.cache.last_time(symbol, granularity)
+            ranges = []
+            if first is None:
+                ranges.append(('append', start_ms, end_ms))
+            else:
+                if start_ms < first:
+                    ranges.append(('merge', start_ms, first))
+                ranges.append(('append', max(start_ms, last + length), end_ms))
+            for mode, start, end in ranges:
+                windows = list(self.windows(start, end, length))
+                for i, window in enumerate(windows):
+                    yield symbol, window, mode, i == len(windows) - 1
+
+    def write(self, symbol, granularity, rows, merge=False):
+        times = rows[:, 0].astype(np.int64)
+        columns = {c: rows[:, i + 1] for i, c in enumerate(['open', 'high', 'low', 'close', 'volume'])}
+        if merge:
+            written = self.cache.merge(symbol, granularity, times, columns)
+        else:
+            written = self.cache.append(symbol, granularity, times, columns)
+        self.written += written
+        return written
+
+    def run(self, symbols, granularity, start_ms, end_ms=None):
+        # Returns the number of candles written
+        length = granularity_ms(granularity)
+        end_ms = floor_time(end_ms or self.api.now_ms(), length)
+        start_ms = floor_time(start_ms, length)
+        started = time.perf_counter()
+        in_flight = deque()
+        merging = {}
+
+        def consume():
+            symbol, mode, last, future = in_flight.popleft()
+            rows = future.result()
+            if mode == 'append':
+                self.write(symbol, granularity, rows)
+            else:
+                merging.setdefault(symbol, []).append(rows)
+                if last:
+                    self.write(symbol, granularity, np.concatenate(merging.pop(symbol)), merge=True)
+            if last:
+                self.log.logger.debug(f'{symbol} {granularity} done, {self.written} candles written')
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='backfill') as pool:
+            for symbol, window, mode, last in self.jobs(symbols, granularity, start_ms, end_ms):
+                in_flight.append((symbol, mode, last, pool.submit(self.fetch_window, symbol, granularity, window)))
+                if len(in_flight) >= self.workers * 2:
+                    consume()
+            while in_flight:
+                consume()
+
+        elapsed = time.perf_counter() - started
+        self.log.logger.debug(f'Backfill {len(symbols)} symbols {granularity}: {self.written} candles, '
+                              f'{self.requests} requests, {self.retries} retries in {elapsed:.1f}s')
+        return self.written
+
+
+if __name__ == '__main__':
+    # python CandleBackfill.py BTCUSDT ETHUSDT --granularity 1m --days 365
+    parser = argparse.ArgumentParser()
+    parser.add_argument('symbols', nargs='+')
+    parser.add_argument('--granularity', default='1m')
+    parser.add_argument('--days', type=float, default=30)
+    parser.add_argument('--workers', type=int, default=CandleBackfill.WORKERS)
+    args = parser.parse_args()
+
+    # Market endpoints only, no credentials needed
+    api = BitgetClient('', '', '')
+    backfill = CandleBackfill(api, CandleCache(), args.workers)
+    written = backfill.run(args.symbols, args.granularity, api.now_ms() - int(args.days * DAY_MS))
+    print(f'{written} candles written, {backfill.requests} requests, {backfill.retries} retries')
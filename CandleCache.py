@@ -0,0 +1,131 @@
+import os
+import shutil
+import threading
+import numpy as np
+
+CACHE_PATH = './cache/candles'
+COLUMNS = {
+    'time': np.int64,
+    'open': np.float64,
+    'high': np.float64,
+    'low': np.float64,
+    'close': np.float64,
+    'volume': np.float64,
+}
+
+
+class CandleCache:
+    """
+    On-disk candle history, one directory per symbol and granularity with one
+    append-only binary file per column. Files are read through np.memmap so only
+    the requested tail is paged in.
+    Only closed candles are stored, times (candle open, epoch ms) strictly increase.
+    The time column is written last and defines how many rows are complete.
+    """
+
+    def __init__(self, path=CACHE_PATH):
+        self.path = path
+        self.locks = {}
+        self.locks_lock = threading.Lock()
+
+    def _lock(self, symbol, granularity):
+        with self.locks_lock:
+            return self.locks.setdefault((symbol, granularity), threading.Lock())
+
+    def _file(self, symbol, granularity, column):
+        return os.path.join(self.path, f'{symbol}_{granularity}', f'{column}.bin')
+
+    def _rows(self, symbol, granularity):
+        filename = self._file(symbol, granularity, 'time')
+        if not os.path.exists(filename):
+            return 0
+        return os.path.getsize(filename) // np.dtype(COLUMNS['time']).itemsize
+
+    def _truncate(self, symbol, granularity):
+        # Cuts every column to the rows complete in all of them, returns that count
+        sizes = {}
+        for column, dtype in COLUMNS.items():
+            filename = self._file(symbol, granularity, column)
+            sizes[column] = os.path.getsize(filename) if os.path.exists(filename) else 0
+        rows = min(size // np.dtype(COLUMNS[column]).itemsize for column, size in sizes.items())
+        for column, size in sizes.items():
+            if size != rows * np.dtype(COLUMNS[column]).itemsize:
+                os.truncate(self._file(symbol, granularity, column), rows * np.dtype(COLUMNS[column]).itemsize)
+        return rows
+
+    def _memmap(self, symbol, granularity, column, rows):
+        if rows == 0:
+            return np.empty(0, dtype=COLUMNS[column])
+        return np.memmap(self._file(symbol, granularity, column), dtype=COLUMNS[column], mode='r', shape=(rows,))
+
+    def last_time(self, symbol, granularity):
+        with self._lock(symbol, granularity):
+            rows = self._rows(symbol, granularity)
+            if rows == 0:
+                return None
+            return int(self._memmap(symbol, granularity, 'time', rows)[-1])
+
+    def first_time(self, symbol, granularity):
+        with self._lock(symbol, granularity):
+            rows = self._rows(symbol, granularity)
+            if rows == 0:
+                return None
+            return int(self._memmap(symbol, granularity, 'time', rows)[0])
+
+    def read(self, symbol, granularity, n=None):
+        # Returns (times, {column: values}) for the last n rows, copied out of the files
+        with self._lock(symbol, granularity):
+            rows = self._rows(symbol, granularity)
+            start = 0 if n is None else max(0, rows - n)
+            columns = {c: np.array(self._memmap(symbol, granularity, c, rows)[start:]) for c in COLUMNS}
+        return columns.pop('time'), columns
+
+    def append(self, symbol, granularity, times, columns):
+        # Rows not newer than the last cached candle are skipped, returns the number written
+        times, index = np.unique(np.asarray(times, dtype=np.int64), return_index=True)
+        columns = {c: np.asarray(v)[index] for c, v in columns.items()}
+        with self._lock(symbol, granularity):
+            # Drop what an interrupted append left past the last whole row, time included
+            rows = self._truncate(symbol, granularity)
+            if rows:
+                last = self._memmap(symbol, granularity, 'time', rows)[-1]
+                keep = times > last
+                times = times[keep]
+                columns = {c: v[keep] for c, v in columns.items()}
+            if len(times) == 0:
+                return 0
+
+            os.makedirs(os.path.dirname(self._file(symbol, granularity, 'time')), exist_ok=True)
+            for column, dtype in COLUMNS.items():
+                if column == 'time':
+                    continue
+                filename = self._file(symbol, granularity, column)
+                with open(filename, 'ab') as f:
+                    f.write(np.asarray(columns[column], dtype=dtype).tobytes())
+            with open(self._file(symbol, granularity, 'time'), 'ab') as f:
+                f.write(times.tobytes())
+            return len(times)
+
+    def merge(self, symbol, granularity, times, columns):
+        # Rows at any time, the cached row wins on a duplicate time; the files are rewritten
+        with self._lock(symbol, granularity):
+            rows = self._rows(symbol, granularity)
+            old = {c: np.array(self._memmap(symbol, granularity, c, rows)) for c in COLUMNS}
+            merged_times = np.concatenate([old.pop('time'), np.asarray(times, dtype=np.int64)])
+            merged_times, index = np.unique(merged_times, return_index=True)
+            merged = {c: np.concatenate([old[c], np.asarray(columns[c], dtype=COLUMNS[c])])[index]
+                      for c in old}
+            merged['time'] = merged_times
+
+            # Written aside then swapped in, the columns are never seen half rewritten
+            directory = os.path.dirname(self._file(symbol, granularity, 'time'))
+            shutil.rmtree(f'{directory}.tmp', ignore_errors=True)
+            os.makedirs(f'{directory}.tmp')
+            for column in COLUMNS:
+                with open(os.path.join(f'{directory}.tmp', f'{column}.bin'), 'wb') as f:
+                    f.write(merged[column].tobytes())
+            if os.path.exists(directory):
+                os.replace(directory, f'{directory}.old')
+            os.replace(f'{directory}.tmp', directory)
+            shutil.rmtree(f'{directory}.old', ignore_errors=True)
+            return len(merged_times) - rows
@@ -0,0 +1,83 @@
+import heapq
+import threading
+from thread_base import ThreadBase
+from models.latency_stats import LatencyStats
+
+
+class CandleScheduler(ThreadBase):
+    """
+    Closes candles of every registered PriceProcessor shortly after the bucket
+    boundary, without waiting for the next tick. One timer thread is shared by all
+    symbols: processors are grouped in slots keyed by their next boundary (exchange time, ms).
+    A boundary is closed after a grace period, the p99 tick latency of the
+    processors, so ticks stamped before it but still in flight make it into the candle.
+    """
+
+    MIN_GRACE_MS = 200
+    MAX_GRACE_MS = 2000
+    GRACE_PERCENTILE = 99
+
+    def __init__(self, clock, logname, shutdown_event):
+        super().__init__(logname=logname)
+        self.clock = clock
+        self.shutdown_event = shutdown_event
+        self.slots = {}
+        self.boundaries = []
+        self.slots_lock = threading.Lock()
+        self.processors = []
+        self.close_latency = LatencyStats('candle close latency')
+
+    def register(self, processor):
+        self.processors.append(processor)
+        length = processor.candle_builder.base_ms
+        now = self.clock.now_ms()
+        self._schedule(now - now % length + length, processor)
+
+    def _schedule(self, boundary, processor):
+        with self.slots_lock:
+            if boundary not in self.slots:
+                self.slots[boundary] = []
+                heapq.heappush(self.boundaries, boundary)
+            self.slots[boundary].append(processor)
+
+    def _pop_due(self, now):
+        due = []
+        with self.slots_lock:
+            while self.boundaries and self.boundaries[0] <= now:
+                boundary = heapq.heappop(self.boundaries)
+                due.append((boundary, self.slots.pop(boundary)))
+        return due
+
+    def grace_ms(self):
+        latencies = [p.tick_latency.percentile(self.GRACE_PERCENTILE) for p in self.processors]
+        latencies = [latency for latency in latencies if latency is not None]
+        grace = max(latencies) if latencies else self.MIN_GRACE_MS
+        return min(self.MAX_GRACE_MS, max(self.MIN_GRACE_MS, grace))
+
+    def _next_wait(self, grace):
+        with self.slots_lock:
+            if not self.boundaries:
+                return 1.0
+            return max(0.0, (self.boundaries[0] + grace - self.clock.now_ms()) / 1000)
+
+    def run(self):
+        while not self.shutdown_event.is_set():
+            grace = self.grace_ms()
+            if self.shutdown_event.wait(self._next_wait(grace)):
+                break
+            for boundary, processors in self._pop_due(self.clock.now_ms() - grace):
+                closed = 0
+                for processor in processors:
+                    try:
+                        if processor.close_candles(boundary):
+                            self.close_latency.record(self.clock.now_ms() - boundary)
+                            closed += 1
+                    except Exception as e:
+                        self.log_message(f'CRASH : {processor.pair} {e}', error=True)
+                    self._schedule(boundary + processor.candle_builder.base_ms, processor)
+
+                if closed:
+                    late = sum(p.candle_builder.late_ticks for p in processors)
+                    self.log_message(f'Boundary {boundary} closed {closed} symbols, grace {grace:.0f}ms, '
+                                     f'{late} late ticks dropped so far, {self.close_latency}')
+        print(f"{self.name} is shutting down gracefully.")
@@ -0,0 +1,85 @@
+import threading
+import time
+from collections import deque
+from thread_base import ThreadBase
+
+
+class ClockSync(ThreadBase):
+    """
+    Exchange clock estimated from the server time endpoint, resampled every
+    `interval` seconds by this thread so reading it never needs a request.
+    Each sync takes the sample with the smallest round trip, assuming the server
+    stamped its time half way through the request. The offset is kept against
+    the monotonic clock (immune to local clock steps) and its drift is the
+    least squares slope over the last `history` syncs.
+    """
+
+    INTERVAL = 60
+    HISTORY = 10
+    # Shorter spans give a slope dominated by the sampling noise
+    MIN_DRIFT_SPAN_MS = 5 * 60 * 1000
+
+    def __init__(self, api, samples=5, interval=INTERVAL, history=HISTORY, shutdown_event=None):
+        super().__init__(logname='ClockSync', api=api)
+        self.samples = samples
+        self.interval = interval
+        self.shutdown_event = shutdown_event or threading.Event()
+        # Local wall clock until the first sync
+        self.synced_at = time.monotonic() * 1000
+        self.offset_ms = time.time() * 1000 - self.synced_at
+        self.rtt_ms = None
+        self.drift = 0.0
+        self.history = deque(maxlen=history)
+        self.state_lock = threading.Lock()
+
+    def sample(self):
+        # (server - monotonic offset, round trip) in ms
+        t0 = time.monotonic() * 1000
+        server_ms = int(self.api._get_timestamp())
+        t1 = time.monotonic() * 1000
+        return server_ms - (t0 + t1) / 2, t1 - t0, (t0 + t1) / 2
+
+    def estimate_drift(self):
+        # ms of offset gained per ms, 0 until the syncs span long enough
+        if len(self.history) < 2 or self.history[-1][0] - self.history[0][0] < self.MIN_DRIFT_SPAN_MS:
+            return 0.0
+        n = len(self.history)
+        mean_t = sum(t for t, _ in self.history) / n
+        mean_o = sum(o for _, o in self.history) / n
+        var = sum((t - mean_t) ** 2 for t, _ in self.history)
+        return sum((t - mean_t) * (o - mean_o) for t, o in self.history) / var
+
+    def sync(self):
+        best = None
+        for _ in range(self.samples):
+            try:
+                offset, rtt, at = self.sample()
+            except Exception as e:
+                self.log_message(f'Server time sample failed: {e}', error=True)
+                continue
+            if best is None or rtt < best[1]:
+                best = (offset, rtt, at)
+
+        if best is not None:
+            offset, rtt, at = best
+            self.history.append((at, offset))
+            drift = self.estimate_drift()
+            with self.state_lock:
+                self.offset_ms, self.rtt_ms, self.synced_at, self.drift = offset, rtt, at, drift
+            self.log_message(f'Clock offset {self.wall_offset_ms():.1f}ms rtt {rtt:.1f}ms drift {drift * 1e6:.1f}ppm')
+        return self.wall_offset_ms()
+
+    def now_ms(self):
+        # Exchange time in epoch ms, no request
+        mono = time.monotonic() * 1000
+        with self.state_lock:
+            return int(mono + self.offset_ms + self.drift * (mono - self.synced_at))
+
+    def wall_offset_ms(self):
+        # Exchange clock minus the local wall clock
+        return self.now_ms() - time.time() * 1000
+
+    def run(self):
+        while not self.shutdown_event.wait(self.interval):
+            self.sync()
+        print(f"{self.name} is shutting down gracefully.")
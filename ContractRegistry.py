@@ -0,0 +1,92 @@
+import json
+import os
+import threading
+import time
+from apis.bitget_client import BitgetClient
+from models.quantizer import Quantizer
+from logger import Logger
+
+CACHE_FILE = './cache/contracts.json'
+
+
+class ContractRegistry:
+    """
+    Process-wide USDT-FUTURES contract metadata.
+    All contracts are loaded with a single request and persisted to disk; the file
+    is reused while younger than `ttl` seconds. Tick-size and lot-size quantizers
+    are built once per symbol.
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    TTL = 24 * 60 * 60
+    PRODUCT_TYPE = 'USDT-FUTURES'
+
+    def __new__(cls, api: BitgetClient = None, ttl=TTL, path=CACHE_FILE):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super().__new__(cls)
+                cls._instance.api = api
+                cls._instance.ttl = ttl
+                cls._instance.path = path
+                cls._instance.contracts = None
+                cls._instance.quantizers = {}
+                cls._instance.load_lock = threading.Lock()
+                cls._instance.log = Logger('ContractRegistry')
+            elif api is not None and cls._instance.api is None:
+                cls._instance.api = api
+            return cls._instance
+
+    def _read_file(self):
+        if not os.path.exists(self.path) or time.time() - os.path.getmtime(self.path) > self.ttl:
+            return None
+        with open(self.path, 'r') as f:
+            return json.loads(f.read())
+
+    def _write_file(self, contracts):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f'{self.path}.tmp'
+        with open(tmp, 'w') as f:
+            f.write(json.dumps(contracts))
+        os.replace(tmp, self.path)
+
+    def fetch(self):
+        # Never from the request cache, a refresh is meant to see newly listed symbols
+        response = self.api.contracts(dict(productType=self.PRODUCT_TYPE), cache=False)
+        contracts = response['data']
+        self._write_file(contracts)
+        self.log.logger.debug(f'Fetched {len(contracts)} contracts')
+        return contracts
+
+    def load(self, refresh=False):
+        with self.load_lock:
+            if self.contracts is not None and not refresh:
+                return
+            contracts = None if refresh else self._read_file()
+            if contracts is None:
+                contracts = self.fetch()
+            self.contracts = {c['symbol']: c for c in contracts}
+            self.quantizers = {}
+
+    def get(self, symbol):
+        self.load()
+        if symbol not in self.contracts:
+            # Listed after the file was written
+            self.load(refresh=True)
+        return self.contracts.get(symbol)
+
+    def _quantizers(self, symbol):
+        if symbol not in self.quantizers:
+            contract = self.get(symbol)
+            price_place = int(contract['pricePlace'])
+            volume_place = int(contract['volumePlace'])
+            tick = float(contract.get('priceEndStep', 1)) * 10 ** -price_place
+            lot = float(contract.get('sizeMultiplier') or 10 ** -volume_place)
+            self.quantizers[symbol] = (Quantizer(price_place, tick), Quantizer(volume_place, lot))
+        return self.quantizers[symbol]
+
+    def price_quantizer(self, symbol):
+        return self._quantizers(symbol)[0]
+
+    def size_quantizer(self, symbol):
+        return self._quantizers(symbol)[1]
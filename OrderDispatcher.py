@@ -0,0 +1,63 @@
+import queue
+import zlib
+from concurrent.futures import Future
+from thread_base import ThreadBase
+
+
+class OrderWorker(ThreadBase):
+    def __init__(self, logname, shutdown_event):
+        super().__init__(logname=logname)
+        self.orders = queue.Queue()
+        self.shutdown_event = shutdown_event
+
+    def execute(self, future: Future, fn, args, kwargs):
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            self.log_message(f'Order failed : {e}', error=True)
+            future.set_exception(e)
+
+    def run(self):
+        while not self.shutdown_event.is_set():
+            try:
+                future, fn, args, kwargs = self.orders.get(timeout=1)
+            except queue.Empty:
+                continue
+            self.execute(future, fn, args, kwargs)
+
+        # Orders still queued at shutdown are not sent
+        while not self.orders.empty():
+            self.orders.get()[0].cancel()
+        print(f"{self.name} is shutting down gracefully.")
+
+
+class OrderDispatcher:
+    """
+    Non-blocking order submission for the strategy threads.
+    Calls run on a pool of worker threads and return a Future right away.
+    A symbol is always served by the same worker, so orders of one symbol
+    are sent in submission order while different symbols run in parallel.
+    """
+
+    def __init__(self, shutdown_event, workers=4):
+        self.workers = [OrderWorker(f'OrderWorker_{i}', shutdown_event) for i in range(workers)]
+
+    def start(self):
+        for worker in self.workers:
+            worker.daemon = False
+            worker.start()
+
+    def worker_for(self, symbol):
+        return self.workers[zlib.crc32(symbol.encode()) % len(self.workers)]
+
+    def submit(self, symbol, fn, *args, callback=None, **kwargs) -> Future:
+        future = Future()
+        if callback is not None:
+            future.add_done_callback(callback)
+        self.worker_for(symbol).orders.put((future, fn, args, kwargs))
+        return future
+
+    def pending(self):
+        return sum(worker.orders.qsize() for worker in self.workers)
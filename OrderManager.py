@@ -1,5 +1,9 @@
 from datetime import datetime as dt
 from apis.bitget_client import BitgetClient
+from AccountCache import AccountCache
+from ContractRegistry import ContractRegistry
+from PlanOrderBook import PlanOrderBook
+from models.plan_order import PlanOrder
 
 class OrderManager:
     def __init__(self, symbol, api: BitgetClient, risk):
@@ -10,6 +14,9 @@ class OrderManager:
         self.api = api
         self.symbol = symbol
         self.risk = risk
+        self.account_cache = AccountCache(api)
+        self.contracts = ContractRegistry(api)
+        self.plan_orders = PlanOrderBook()
 
         self.contract = self.get_instrument_contract()
         if self.contract is None or not self.contract:
@@ -17,6 +24,8 @@ class OrderManager:
         self.volume_place = int(self.contract['volumePlace'])  # Get size precision
         self.price_place = int(self.contract['pricePlace'])    # Get price precision
         self.min_trade_num = float(self.contract['minTradeNum']) # Minimum trade amount
+        self.quantize_price = self.contracts.price_quantizer(self.symbol)  # Tick size
+        self.quantize_size = self.contracts.size_quantizer(self.symbol)    # Lot size
 
         self.order_tracker = {}  # Dictionary to track order status
 
@@ -29,32 +38,33 @@ class OrderManager:
         return str(uuid.uuid4())
     
     def get_account_balance(self):
-        try:
-            response = self.api.account(dict(symbol=self.symbol, productType='USDT-FUTURES', marginCoin='USDT'))
-            if response and 'data' in response:
-                print(f"Account balance: {response['data']['available']}")
-                return float(response['data']['available'])
-            
-            else:
-                print(f"Unexpected response format: {response}")
-                return None
-        except Exception as e:
-            print(f"Error getting account details: {e}")
-            return None
+        # Served from the shared account cache, REST only when the balance is stale
+        available = self.account_cache.get_available(self.symbol, 'USDT')
+        if available is None:
+            print(f"Account balance unavailable for {self.symbol}")
+        return available
 
     def get_instrument_contract(self):
         try:
-            contract = self.api.contracts(dict(symbol=self.symbol, productType='USDT-FUTURES'))
-            if contract and 'data' in contract and contract['data']:
-                print(f"Contract detail: {contract['data'][0]}")
-                return contract['data'][0]
-            else:
-                return None  # Or raise an exception
+            return self.contracts.get(self.symbol)
         except Exception as e:
             print(f"Error getting contract: {e}")
             return None
 
-    def place_trigger_order(self, side, order_type, price, sl, tp):
+    def place_trigger_order(self, side, order_type, price, sl, tp, client_oid=None):
+        params = self.trigger_order_params(side, order_type, price, sl, tp, client_oid)
+        if params is None:
+            return "Failed to get account balance"
+
+        # print(f"Placing order: {params}")
+        try:
+            response = self.api.placePlanOrder(params)
+            return response
+        except Exception as e:
+            print(f"Failed to place order: {e}")
+
+    def trigger_order_params(self, side, order_type, price, sl, tp, client_oid=None):
+        # Request body of a trigger order, None when the size can't be computed
 
         # pending_orders = self.api.ordersPlanPending(dict(symbol=self.symbol, productType='USDT-FUTURES', marginCoin='USDT'))
         # if pending_orders and 'data' in pending_orders and pending_orders['data']:
@@ -65,17 +75,17 @@ class OrderManager:
         # Get the current account balance
         balance = self.get_account_balance()
         if balance is None:
-            return "Failed to get account balance"
+            return None
 
-        size = round(balance * self.risk, self.volume_place)  # Round size to correct precision
+        size = self.quantize_size(balance * self.risk)  # Round size to the lot size
         # print(f"Calculated size: {size}")
         # if not self.is_valid_order(size):
         #     raise ValueError(f"Order size {size} is less than the minimum {self.min_trade_num} for {self.symbol}")
-        price = round(price, self.price_place) # Round price to correct precision
-        tp = round(tp, self.price_place) # Round tp to correct precision
-        sl = round(sl, self.price_place) # Round sl to correct precision
+        price = self.quantize_price(price) # Round price to the tick size
+        tp = self.quantize_price(tp) # Round tp to the tick size
+        sl = self.quantize_price(sl) # Round sl to the tick size
 
-        oid = self.oid()  # Generate a unique order ID
+        oid = client_oid or self.oid()  # Generate a unique order ID
 
         params = {
             "planType": "normal_plan",
@@ -96,13 +106,63 @@ class OrderManager:
             "stopLossTriggerPrice": str(sl),  # Convert sl to string
             "stopLossTriggerType": "mark_price"
         }
+        return params
+
+    def amend_trigger_order(self, order: PlanOrder, side, order_type, price, sl, tp):
+        # Moves a working trigger order to a new price, cancel-replace when the amend is rejected
+        price = self.quantize_price(price)
+        tp = self.quantize_price(tp)
+        sl = self.quantize_price(sl)
+        params = {
+            "planType": "normal_plan",
+            "symbol": self.symbol,
+            "productType": "USDT-FUTURES",
+            "orderId": order.order_id,
+            "clientOid": order.client_oid,
+            "newTriggerPrice": str(price),
+            "newTriggerType": "mark_price",
+            "newStopSurplusTriggerPrice": str(tp),
+            "newStopSurplusTriggerType": "mark_price",
+            "newStopLossTriggerPrice": str(sl),
+            "newStopLossTriggerType": "mark_price"
+        }
+        if order_type == 'limit':
+            params["newPrice"] = str(price)
 
-        # print(f"Placing order: {params}")
         try:
-            response = self.api.placePlanOrder(params)
+            response = self.api.modifyPlanOrder(params)
+            self.plan_orders.on_amended(order.client_oid, price)
             return response
         except Exception as e:
-            print(f"Failed to place order: {e}")
+            print(f"Failed to amend order {order.client_oid}, replacing it: {e}")
+
+        try:
+            self.api.cancelPlanOrder({
+                "symbol": self.symbol,
+                "productType": "USDT-FUTURES",
+                "marginCoin": "USDT",
+                "planType": "normal_plan",
+                "orderIdList": [{"orderId": order.order_id, "clientOid": order.client_oid}]
+            })
+        except Exception as e:
+            # Still working (or already gone, the websocket will tell), amended again on the next candle
+            print(f"Failed to cancel order {order.client_oid}: {e}")
+            return None
+
+        # The replacement is recorded before the cancelled order is dropped, the side stays reserved
+        params = self.trigger_order_params(side, order_type, price, sl, tp)
+        if params is None:
+            self.plan_orders.remove(order.client_oid, PlanOrder.CANCELLED)
+            return "Failed to get account balance"
+        self.plan_orders.add(params["clientOid"], self.symbol, side, price)
+        self.plan_orders.remove(order.client_oid, PlanOrder.CANCELLED)
+        try:
+            response = self.api.placePlanOrder(params)
+        except Exception:
+            self.plan_orders.remove(params["clientOid"], PlanOrder.FAILED)
+            raise
+        self.plan_orders.on_placed(params["clientOid"], response)
+        return response
 
     def is_valid_order(self, amount):
         return amount >= self.min_trade_num
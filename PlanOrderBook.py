@@ -0,0 +1,131 @@
+import threading
+from apis.bitget_client import BitgetClient
+from models.plan_order import PlanOrder
+from logger import Logger
+
+# Plan types of entry trigger orders, v1 websocket / REST; TP/SL plans are never adopted
+NORMAL_PLANS = ('pl', 'normal_plan')
+
+# Websocket (v1 ordersAlgo `state`, v2 orders-algo `status`) and REST (`planStatus`) plan order status
+STATUSES = {
+    'not_trigger': PlanOrder.LIVE,
+    'live': PlanOrder.LIVE,
+    'triggered': PlanOrder.TRIGGERED,
+    'executed': PlanOrder.TRIGGERED,
+    'fail_trigger': PlanOrder.FAILED,
+    'fail_execute': PlanOrder.FAILED,
+    'cancel': PlanOrder.CANCELLED,
+    'cancelled': PlanOrder.CANCELLED,
+}
+
+
+class PlanOrderBook:
+    """
+    Process-wide book of our own plan (trigger) orders, keyed by clientOid.
+    Orders are added when sent, acknowledged by the REST response and then kept
+    current by the private plan order websocket channel. Finished orders are
+    dropped, so the book only holds what is still working on the exchange.
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    PRODUCT_TYPE = 'USDT-FUTURES'
+
+    def __new__(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super().__new__(cls)
+                cls._instance.orders = {}
+                cls._instance.orders_lock = threading.Lock()
+                cls._instance.log = Logger('PlanOrderBook')
+            return cls._instance
+
+    def add(self, client_oid, symbol, side, trigger_price):
+        order = PlanOrder(client_oid, symbol, side, trigger_price)
+        with self.orders_lock:
+            self.orders[order.client_oid] = order
+        return order
+
+    def on_placed(self, client_oid, response):
+        # REST acknowledgement, the websocket push may already have arrived.
+        # Dropped when it carries no orderId, a NEW order would block its side forever
+        data = response.get('data') if isinstance(response, dict) else None
+        with self.orders_lock:
+            order = self.orders.get(client_oid)
+            if order is None:
+                return False
+            order.order_id = order.order_id or (data or {}).get('orderId')
+            acknowledged = order.order_id is not None
+            if acknowledged and order.status == PlanOrder.NEW:
+                order.status = PlanOrder.LIVE
+        if not acknowledged:
+            self.log.logger.error(f'{client_oid} not acknowledged: {response}')
+            self.remove(client_oid, PlanOrder.FAILED)
+        return acknowledged
+
+    def on_amended(self, client_oid, trigger_price):
+        with self.orders_lock:
+            order = self.orders.get(client_oid)
+            if order is not None:
+                order.trigger_price = float(trigger_price)
+
+    def remove(self, client_oid, status):
+        with self.orders_lock:
+            order = self.orders.pop(client_oid, None)
+        if order is not None:
+            order.status = status
+            self.log.logger.debug(f'{order}')
+        return order
+
+    def on_orders_algo(self, entries):
+        # Websocket push, one entry per changed plan order, or the REST pending list
+        for entry in entries:
+            client_oid = entry.get('cOid') or entry.get('clientOid')
+            status = STATUSES.get(entry.get('state') or entry.get('planStatus') or entry.get('status'))
+            if client_oid is None or status is None:
+                continue
+            if status != PlanOrder.LIVE:
+                self.remove(client_oid, status)
+                continue
+            with self.orders_lock:
+                order = self.orders.get(client_oid)
+                if order is None:
+                    if entry.get('planType') not in NORMAL_PLANS:
+                        continue
+                    # Placed by an earlier run
+                    symbol = (entry.get('instId') or entry.get('symbol')).split('_')[0]
+                    order = PlanOrder(client_oid, symbol, entry.get('side'),
+                                      entry.get('triggerPx') or entry.get('triggerPrice'))
+                    self.orders[client_oid] = order
+                order.order_id = entry.get('id') or entry.get('orderId') or order.order_id
+                if entry.get('triggerPx') or entry.get('triggerPrice'):
+                    order.trigger_price = float(entry.get('triggerPx') or entry.get('triggerPrice'))
+                order.status = PlanOrder.LIVE
+
+    def reconcile(self, api: BitgetClient, symbol):
+        # Book of a symbol brought in line with the exchange pending list: orders left by an
+        # earlier run are adopted, acknowledged orders missing from it (a lost websocket push) dropped.
+        # Runs on the symbol's order worker, so no order of the symbol is in flight meanwhile.
+        with self.orders_lock:
+            acknowledged = {o.client_oid for o in self.orders.values() if o.symbol == symbol and o.status == PlanOrder.LIVE}
+        response = api.ordersPlanPending(dict(symbol=symbol, productType=self.PRODUCT_TYPE, planType='normal_plan'))
+        entries = (response.get('data') or {}).get('entrustedList') or []
+        self.on_orders_algo(entries)
+
+        pending = {entry.get('clientOid') for entry in entries}
+        for client_oid in acknowledged - pending:
+            # Triggered or cancelled, either way not working anymore
+            self.log.logger.error(f'{client_oid} no longer pending')
+            self.remove(client_oid, PlanOrder.CANCELLED)
+
+        with self.orders_lock:
+            loaded = sum(1 for o in self.orders.values() if o.symbol == symbol and o.status == PlanOrder.LIVE)
+        if loaded < len(entries):
+            self.log.logger.error(f'{symbol}: {len(entries) - loaded} of {len(entries)} pending plan orders not loaded')
+        return loaded
+
+    def working(self, symbol, side):
+        # Newest working order of a symbol and side, None when there is none
+        with self.orders_lock:
+            orders = [o for o in self.orders.values() if o.symbol == symbol and o.side == side and o.is_working()]
+        return orders[-1] if orders else None
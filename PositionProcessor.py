@@ -26,7 +26,8 @@ class PositionProcessor(ThreadBase):
 
     def run(self):
         while not self.shutdown_event.is_set():
-            self.events[self.pair].wait()
+            if not self.events[self.pair].wait(timeout=1):
+                continue
             self.process_position()
             self.events[self.pair].clear()
         print(f"{self.name} is shutting down gracefully.")
@@ -1,122 +1,86 @@
-import pandas as pd
 from thread_base import ThreadBase
 from models.live_prices import LiveStreamPrice
+from models.candle_builder import CandleBuilder
+from models.latency_stats import LatencyStats
+from ring_buffer import SpscRingBuffer
 import threading
-import datetime as dt
-import pytz
-import copy
-
-GRANULARITIES = {
-    '1m': 1,
-    '5m': 5,
-    '15m': 15,
-    '1h': 60
-}
 
 
 class PriceProcessor(ThreadBase):
-    def __init__(self, shared_prices, price_lock: threading.Lock, price_events, price_queue, candle_queue, logname, pair, granularity, shutdown_event):
-        super().__init__(logname=logname, shared=shared_prices, lock=price_lock, events=price_events)
+    LATENCY_LOG_EVERY = 10000
+
+    def __init__(self, price_buffer: SpscRingBuffer, price_queue, candle_queue, logname, pair, granularities, shutdown_event, clock=None):
+        super().__init__(logname=logname)
         self.pair = pair
-        self.granularity = GRANULARITIES[granularity]
-        self.current_candle_data_df = pd.DataFrame(columns=['time', 'price'])
+        self.price_buffer = price_buffer
+        self.dropped = 0
+        self.candle_builder = CandleBuilder(granularities)
+        # Candles are closed from this thread and from the CandleScheduler
+        self.candle_lock = threading.Lock()
         self.candle_queue= candle_queue
         self.price_queue= price_queue
         self.shutdown_event = shutdown_event
-    
-        now = dt.datetime.now(pytz.timezone('UTC'))
-        self.set_last_candle(now)
-        print(f'PriceProcessor {self.last_complete_candle_time} now: {now}')
-
-    def set_last_candle(self, price_time:dt.datetime):
-        self.last_complete_candle_time = self.round_time_down(
-            price_time #- dt.timedelta(minutes=self.granularity)
-        )
+        # Exchange stamp to processing, measured on the synced exchange clock
+        self.clock = clock
+        # Recent samples kept, the CandleScheduler waits for their p99 after a boundary
+        self.tick_latency = LatencyStats(f'{pair} tick latency', window=1000)
+        self.late_ticks = 0
 
-    def round_time_down(self, round_me: dt.datetime):
-        reminder = round_me.minute % self.granularity
-        candle_time = dt.datetime(round_me.year,
-                                  round_me.month,
-                                  round_me.day,
-                                  round_me.hour,
-                                  round_me.minute - reminder,
-                                  tzinfo=pytz.timezone('UTC'))
-        return candle_time
+    def record_latency(self, ts):
+        self.tick_latency.record(self.clock.now_ms() - ts)
+        if self.tick_latency.count % self.LATENCY_LOG_EVERY == 0:
+            self.log_message(f'{self.tick_latency}')
 
     def detect_new_candle(self, price: LiveStreamPrice):
-        old = self.last_complete_candle_time
-        self.set_last_candle(price.time)
-        if old < self.last_complete_candle_time:
-            candle = self.construct_candle()
-            self.update_candle(self.pair, candle)
-            
-            print(f'New Candle : {self.pair} Last Complete Candle {self.last_complete_candle_time} Current candle time {price.time}')
+        ts = int(price.time.timestamp() * 1000)
+        if self.clock is not None:
+            self.record_latency(ts)
+        with self.candle_lock:
+            self.emit_candles(self.candle_builder.add_tick(ts, price.price))
+
+    def close_candles(self, boundary_ms):
+        # Called by the CandleScheduler at each boundary, returns True if a candle was emitted
+        with self.candle_lock:
+            return self.emit_candles(self.candle_builder.close_until(boundary_ms))
+
+    def emit_candles(self, closed):
+        for granularity, candle in closed:
+            self.update_candle(self.pair, granularity, candle)
+            print(f'New Candle : {self.pair} {granularity} {candle}')
+        return len(closed) > 0
 
-    def update_candle(self, symbol, candle):
-        self.candle_queue[symbol].put(candle)
+    def update_candle(self, symbol, granularity, candle):
+        self.candle_queue[symbol][granularity].put(candle)
 
     def update_price(self, symbol, price):
         self.price_queue[symbol].put(price)
 
-    def construct_candle(self):
-        if not self.current_candle_data_df.empty:
-            # Calculate the open, high, low, and close prices
-            open_price = self.current_candle_data_df.iloc[0]['price']
-            high_price = self.current_candle_data_df['price'].max()
-            low_price = self.current_candle_data_df['price'].min()
-            close_price = self.current_candle_data_df.iloc[-1]['price']
-            
-            # Create a dictionary with OHLC values and the timestamp of the candle
-            candle_data = {
-                'datetime': self.last_complete_candle_time,
-                'open': open_price,
-                'high': high_price,
-                'low': low_price,
-                'close': close_price,
-                'volume': self.current_candle_data_df['volume'].sum() if 'volume' in self.current_candle_data_df.columns else 0,  # Add volume if available
-            }
-            
-            # Print or log the constructed candle for debugging
-            print(f"Constructed Candle: {candle_data}")
-            
-            # Reset the DataFrame for the next candle
-            self.current_candle_data_df = pd.DataFrame(columns=['datetime', 'price'])
-            
-            return candle_data
-        else:
-            print("No data available to construct a candle.")
-            return None
-
-    def process_price(self):
+    def process_price(self, price: LiveStreamPrice):
         try:
-            self.lock.acquire()
-            price = copy.deepcopy(self.shared[self.pair])
-            if price is not None:
-                # todo : might update only if price changes ------------------
-                self.update_price(self.pair, price)
-
-                new_data = pd.DataFrame([{'time': price.time, 'price': price.price}])
-                
-                # Concatenate only if current_candle_data_df has data
-                if not self.current_candle_data_df.empty:
-                    self.current_candle_data_df = pd.concat([self.current_candle_data_df, new_data]).reset_index(drop=True)
-                else:
-                    # If empty, directly assign the new data to avoid concatenating with an empty DataFrame
-                    self.current_candle_data_df = new_data
-                
-                # Print updated DataFrame
-                # print('Current DataFrame:\n', self.current_candle_data_df)
-                self.detect_new_candle(price)
+            # todo : might update only if price changes ------------------
+            self.update_price(self.pair, price)
+            self.detect_new_candle(price)
 
         except Exception as e:
             self.log_message(f'CRASH : {e}', error=True)
-        finally:
-            self.lock.release()
+
+    def check_dropped(self):
+        if self.price_buffer.dropped != self.dropped:
+            self.dropped = self.price_buffer.dropped
+            self.log_message(f'Price buffer overflow {self.pair}: {self.price_buffer.stats()}', error=True)
+
+    def check_late(self):
+        # Ticks of an already closed candle, lost for it
+        if self.candle_builder.late_ticks != self.late_ticks:
+            self.late_ticks = self.candle_builder.late_ticks
+            self.log_message(f'Late ticks {self.pair}: {self.late_ticks}', error=True)
 
     def run(self):
         while not self.shutdown_event.is_set():
-            self.events[self.pair].wait()
-            self.process_price()
-            self.events[self.pair].clear()
+            if not self.price_buffer.wait(timeout=1):
+                continue
+            for price in self.price_buffer.drain():
+                self.process_price(price)
+            self.check_dropped()
+            self.check_late()
         print(f"{self.name} is shutting down gracefully.")
-
@@ -1,54 +1,145 @@
-import pandas as pd
+import time
+import numpy as np
 from thread_base import ThreadBase
+from indicators import find_pivots, last_pivot_levels, IncrementalPivots
 from apis.bitget_client import BitgetClient
 from OrderManager import OrderManager
+from OrderDispatcher import OrderDispatcher
 
 from models.live_position import LivePosition
+from models.plan_order import PlanOrder
 from models.live_prices import LiveStreamPrice
 from models.trade_settings import TradeSettings
+from models.candle_store import CandleStore
+from models.candle_builder import granularity_ms, floor_time, rest_granularity
+from CandleCache import CandleCache
+from event_mux import Waker
+
+
+def candle_columns(rows):
+    # REST candle rows to (times, {column: values})
+    columns = {c: rows[:, i + 1] for i, c in enumerate(['open', 'high', 'low', 'close', 'volume'])}
+    return rows[:, 0].astype(np.int64), columns
+
 
 class Strategy(ThreadBase):
+    WAIT_TIMEOUT = 1.0
+    LATENCY_LOG_EVERY = 1000
+    # Seconds between plan order reconciliations against the exchange pending list
+    RECONCILE_INTERVAL = 300
 
-    def __init__(self, price_queue, candle_queue, position_queue, api, order_manager, logname, pair, settings, shutdown_event):
+    def __init__(self, price_queue, candle_queues, position_queue, api, order_manager, logname, pair, settings, shutdown_event, candle_cache=None, order_dispatcher=None):
         super().__init__(logname=logname, api=api)
         self.pair = pair
         self.settings : TradeSettings = settings
         self.api: BitgetClient = api
-        self.df = None
-        self.candle_queue= candle_queue
+        self.candles = CandleStore(settings.candle_window)
+        self.candle_cache: CandleCache = candle_cache
+        self.indicators_ready = False
+        self.last_reconcile = time.monotonic()
+        self.pivots = IncrementalPivots()
+        # One queue per timeframe, orders are driven by the trading granularity
+        self.candle_queues= candle_queues
+        self.candle_queue= candle_queues[settings.granularity]
+        self.last_candles = {}
         self.price_queue= price_queue
         self.position_queue= position_queue
         self.order_manager: OrderManager = order_manager(self.pair, self.api, settings.risk)
+        self.order_dispatcher: OrderDispatcher = order_dispatcher
         self.long_position = None
         self.short_position = None
         self.shutdown_event = shutdown_event
 
-    def update_df(self, candle):
-        if self.df is None:
-            params = {
-            "symbol": self.pair,  
-            "productType": "USDT-FUTURES",  
-            "granularity": self.settings.granularity,  
-            "limit": "100"
-            }
-            ohlc_data = self.api.candles(params)['data']
-            df = pd.DataFrame(ohlc_data, columns=['datetime', 'open', 'high', 'low', 'close', 'volume', 'QuoteAssetVolume']).astype(float)
-
-            # Convert the Timestamp column to datetime
-            df['datetime'] = pd.to_numeric(df['datetime'])
-            df['datetime'] = pd.to_datetime(df['datetime'], unit='ms')
-
-            # Set the Timestamp column as the index
-            df.set_index('datetime', inplace=True)
-            self.df = df
-            
-        else:
-            new_row = pd.DataFrame([candle]).set_index('datetime')
-            temp_df = pd.concat([self.df, new_row], ignore_index=False)
-            self.df = temp_df[-100:]
+        self.waker = Waker(f'{self.pair} wake-up latency')
+        for queue in [self.price_queue, self.position_queue, *self.candle_queues.values()]:
+            queue.attach(self.waker)
+
+    @property
+    def df(self):
+        # DataFrame copy of the candle window, built on demand only
+        return self.candles.to_frame()
+
+    def fetch_candles(self, start_ms, end_ms):
+        # Closed candles opened in [start_ms, end_ms) from REST
+        params = {
+        "symbol": self.pair,  
+        "productType": "USDT-FUTURES",  
+        "granularity": rest_granularity(self.settings.granularity),  
+        }
+        # datetime, open, high, low, close, volume, QuoteAssetVolume
+        rows = list(self.api.iterCandles(params, start_ms, end_ms, granularity_ms(self.settings.granularity)))
+        rows = np.array(rows, dtype=float).reshape(-1, 7)
+        _, index = np.unique(rows[:, 0], return_index=True)
+        return rows[index]
+
+    def load_candles(self):
+        # Cached history topped up with the candles closed since the last run
+        granularity = self.settings.granularity
+        window = self.settings.candle_window
+        length = granularity_ms(granularity)
+        current = floor_time(self.api.now_ms(), length)
+
+        start = current - window * length
+        if not self.candle_cache:
+            times, columns = candle_columns(self.fetch_candles(start, current))
+            self.candles.load(times, columns)
+            self.log_message(f'Loaded {len(self.candles)} candles from REST')
+            return
+
+        # Only exchange candles are cached: history missing before the first cached one is
+        # merged in, the candles closed since the last cached one appended
+        first = self.candle_cache.first_time(self.pair, granularity)
+        last = self.candle_cache.last_time(self.pair, granularity)
+        fetched = 0
+        if first is not None and start < first:
+            times, columns = candle_columns(self.fetch_candles(start, first))
+            if len(times):
+                self.candle_cache.merge(self.pair, granularity, times, columns)
+            fetched += len(times)
+        if last is not None:
+            start = max(start, last + length)
+        times, columns = candle_columns(self.fetch_candles(start, current))
+        self.candle_cache.append(self.pair, granularity, times, columns)
+        fetched += len(times)
+
+        times, columns = self.candle_cache.read(self.pair, granularity, window)
+        self.candles.load(times, columns)
+        self.log_message(f'Loaded {len(self.candles)} candles, {fetched} from REST')
+
+    def warm_up(self):
+        # Ready to trade on the first live candle
+        try:
+            self.load_candles()
+            if len(self.candles):
+                self.compute_indicators(False)
+        except Exception as e:
+            self.log_message(f'Warm up failed : {e}', error=True)
+        # Trigger orders left working by an earlier run are amended instead of duplicated
+        try:
+            self.order_manager.plan_orders.reconcile(self.api, self.pair)
+        except Exception as e:
+            self.log_message(f'Loading pending plan orders failed : {e}', error=True)
+
+    def update_candles(self, candle):
+        # Returns True when the candle was appended to the window
+        if len(self.candles) == 0:
+            self.load_candles()
+
+        ts = int(candle['datetime'].timestamp() * 1000)
+        last = self.candles.last_time()
+        if last is not None and ts > last + granularity_ms(self.settings.granularity):
+            # Candles closed between the REST load and the first full live candle
+            self.load_candles()
+            self.indicators_ready = False
+            last = self.candles.last_time()
+        if last is None or ts > last:
+            self.candles.append(ts, candle)
+            return True
+        if ts == last:
+            # Same candle from REST and live, the live one replaces it
+            self.candles.replace_last(ts, candle)
+        return False
 
-        
-    
     # def get_orders(self):
     #     return self.api.get_open_position(symbol=self.pair)
     
@@ -93,31 +184,44 @@ class Strategy(ThreadBase):
             return 0 
         
     def populate_indicators(self):
-        
-        df = self.df
-        df = df.reset_index()
-        df['hh_ll'] = df.apply(lambda row: self._find_high_low(row.name, df), axis=1)
-        df.set_index('datetime', inplace=True)
-
-        self.df = df 
+        candles = self.candles
+        candles.view('hh_ll')[:] = find_pivots(candles.view('high'), candles.view('low'))
 
     def find_last_h_l(self):
-        df = self.df
+        candles = self.candles
 
-        last_h_l = {"hh": None, "ll": None}
+        # Last higher-high (HH) and lower-low (LL) at every row
+        hh, ll = last_pivot_levels(candles.view('high'), candles.view('low'), candles.view('hh_ll'))
+        candles.view('hh')[:] = hh
+        candles.view('ll')[:] = ll
 
-        for index, row in df.iterrows():
-            # Update the last higher-high (HH) and lower-low (LL) if there's a pivot high or low
-            if row['hh_ll'] == 1:  # New pivot high
-                last_h_l['hh'] = row['high']
-            elif row['hh_ll'] == -1:  # New pivot low
-                last_h_l['ll'] = row['low']
+    def update_indicators(self):
+        # Only the candle `window` rows back got its pivot decided by the new candle,
+        # hh/ll change from that row on
+        candles = self.candles
+        window = self.pivots.window
+        size = 2 * window + 1
+        pivot = self.pivots.append(candles.view('high', size), candles.view('low', size))
 
-            # Store the last HH and LL in the data frame
-            df.loc[index, 'hh'] = last_h_l['hh']
-            df.loc[index, 'll'] = last_h_l['ll']
+        rows = window + 1
+        hh_ll = candles.view('hh_ll', rows)
+        hh_ll[0] = pivot
+        hh_ll[1:] = 0
+        candles.view('hh', rows)[:] = self.pivots.last_hh
+        candles.view('ll', rows)[:] = self.pivots.last_ll
 
-        self.df = df   
+    def compute_indicators(self, appended):
+        if len(self.candles) == 0:
+            return
+        incremental = (self.settings.incremental_indicators and appended
+                       and self.indicators_ready and len(self.candles) > 2 * self.pivots.window)
+        if incremental:
+            self.update_indicators()
+        else:
+            self.populate_indicators()
+            self.find_last_h_l()
+            self.pivots.seed(self.candles.view('hh')[-1], self.candles.view('ll')[-1])
+            self.indicators_ready = True
 
     def peek(self):
         try:
@@ -138,28 +242,81 @@ class Strategy(ThreadBase):
                 else:
                     self.short_position = None
         
+    def on_order_done(self, future):
+        # Runs on the order worker thread
+        if future.cancelled():
+            self.log_message('Order cancelled before being sent')
+        elif future.exception() is not None:
+            self.log_message(f'Order failed : {future.exception()}', error=True)
+        else:
+            print(future.result())
+
+    def on_trigger_order_done(self, client_oid, future):
+        # Acknowledges the order in the plan order book, a failed one is dropped from it
+        if future.cancelled() or future.exception() is not None:
+            self.order_manager.plan_orders.remove(client_oid, PlanOrder.FAILED)
+        else:
+            try:
+                self.order_manager.plan_orders.on_placed(client_oid, future.result())
+            except Exception as e:
+                # Raised in a future callback it would be swallowed, the order left NEW
+                self.order_manager.plan_orders.remove(client_oid, PlanOrder.FAILED)
+                self.log_message(f'Order acknowledgement failed : {e}', error=True)
+        self.on_order_done(future)
+
+    def submit_trigger_order(self, side, order_type, price, sl, tp):
+        # Skips when the working order already sits at this price, amends it otherwise
+        order = self.order_manager.plan_orders.working(self.pair, side)
+        if order is not None:
+            if order.trigger_price == self.order_manager.quantize_price(price) or order.order_id is None:
+                # Unchanged, or not acknowledged yet and decided again on the next candle
+                return None
+            if self.order_dispatcher is None:
+                print(self.order_manager.amend_trigger_order(order, side, order_type, price, sl, tp))
+                return None
+            return self.order_dispatcher.submit(self.pair, self.order_manager.amend_trigger_order,
+                                                order, side, order_type, price, sl, tp, callback=self.on_order_done)
+
+        # Tracked right away so the next cycle can't place it twice
+        client_oid = self.order_manager.oid()
+        self.order_manager.plan_orders.add(client_oid, self.pair, side, self.order_manager.quantize_price(price))
+        if self.order_dispatcher is None:
+            response = self.order_manager.place_trigger_order(side, order_type, price, sl, tp, client_oid)
+            self.order_manager.plan_orders.on_placed(client_oid, response)
+            print(response)
+            return None
+        # Never blocks the strategy thread on the HTTP request (and balance lookup)
+        return self.order_dispatcher.submit(self.pair, self.order_manager.place_trigger_order,
+                                            side, order_type, price, sl, tp, client_oid,
+                                            callback=lambda future: self.on_trigger_order_done(client_oid, future))
+
     def place_trigger_orders(self):
-        if self.long_position is None:
-            hh = self.df['hh'].iloc[-1]
+        # No level to place at before the first candle
+        if len(self.candles) == 0:
+            return
+        if self.long_position is None and not np.isnan(self.candles.view('hh')[-1]):
+            hh = float(self.candles.view('hh')[-1])
             # print(hh)
             long_order_price = hh #- (hh * self.settings.dist)
             sl = long_order_price - (long_order_price * self.settings.sl_pct)
             tp = long_order_price + (long_order_price * self.settings.tp_pct)
-            print(self.order_manager.place_trigger_order('buy', 'limit', long_order_price, sl, tp))
+            self.submit_trigger_order('buy', 'limit', long_order_price, sl, tp)
 
-        if self.short_position is None:
-            ll = self.df['ll'].iloc[-1]
+        if self.short_position is None and not np.isnan(self.candles.view('ll')[-1]):
+            ll = float(self.candles.view('ll')[-1])
             # print(ll)
             short_order_price = ll #+ (ll * self.settings.dist)
             sl = short_order_price + (short_order_price * self.settings.sl_pct)
             tp = short_order_price - (short_order_price * self.settings.tp_pct)
-            print(self.order_manager.place_trigger_order('sell', 'limit', short_order_price, sl, tp))
+            self.submit_trigger_order('sell', 'limit', short_order_price, sl, tp)
 
     def pick_upcoming_price(self):
         if not self.price_queue.empty():
             new_price = self.price_queue.get()
             print(new_price)
             # trail stop
+            return True
+        return False
 
     def pick_upcoming_position(self):
         if not self.position_queue.empty():
@@ -167,26 +324,72 @@ class Strategy(ThreadBase):
             print('UPCOMING POSITION', position)
             # check opening closing position 
             # return self.check_position(position)
+            return True
+        return False
     
+    def pick_upcoming_htf_candles(self):
+        picked = False
+        for granularity, candle_queue in self.candle_queues.items():
+            if granularity != self.settings.granularity and not candle_queue.empty():
+                self.last_candles[granularity] = candle_queue.get()
+                picked = True
+        return picked
+
     def pick_upcoming_candle(self):
         if not self.candle_queue.empty():
             candle = self.candle_queue.get()
             # print(candle) # print for debug
-            self.update_df(candle)
-            self.populate_indicators()
-            self.find_last_h_l()
-            self.log_message(f'DF updated :\n {self.df.tail(2)}')
+            appended = self.update_candles(candle)
+            self.compute_indicators(appended)
+            self.log_message(f'DF updated :\n {self.candles.to_frame(2)}')
             self.place_trigger_orders()
+            self.reconcile_plan_orders()
+            return True
+        return False
+
+    def reconcile_plan_orders(self):
+        # Catches websocket pushes lost during a reconnect, on the order worker after this cycle's orders
+        if time.monotonic() - self.last_reconcile < self.RECONCILE_INTERVAL:
+            return
+        self.last_reconcile = time.monotonic()
+        if self.order_dispatcher is not None:
+            self.order_dispatcher.submit(self.pair, self.order_manager.plan_orders.reconcile, self.api, self.pair,
+                                         callback=self.on_reconciled)
+            return
+        try:
+            self.order_manager.plan_orders.reconcile(self.api, self.pair)
+        except Exception as e:
+            self.log_message(f'Plan order reconciliation failed : {e}', error=True)
+
+    def on_reconciled(self, future):
+        if not future.cancelled() and future.exception() is not None:
+            self.log_message(f'Plan order reconciliation failed : {future.exception()}', error=True)
 
     
+    def pick_upcoming(self):
+        # --- On new price
+        picked = self.pick_upcoming_price()
+        # --- On new position
+        picked |= self.pick_upcoming_position()
+        # --- On new candle
+        picked |= self.pick_upcoming_candle()
+        # --- On new higher timeframe candles
+        picked |= self.pick_upcoming_htf_candles()
+        return picked
+
     def run(self):
+        self.warm_up()
+        wakes = 0
         while not self.shutdown_event.is_set():
-            # --- On new price
-            self.pick_upcoming_price()
-            # --- On new position
-            self.pick_upcoming_position()
-            # --- On new candle
-            self.pick_upcoming_candle()
+            # Sleeps until one of the input queues gets an item or shutdown is signalled
+            if not self.waker.wait(timeout=self.WAIT_TIMEOUT):
+                continue
+            while self.pick_upcoming():
+                pass
+
+            wakes += 1
+            if wakes % self.LATENCY_LOG_EVERY == 0:
+                self.log_message(f'{self.waker.latency}')
         
         print(f"{self.name} is shutting down gracefully.")
             
@@ -5,13 +5,21 @@ from logger import Logger
 from models.trade_settings import TradeSettings
 from models.api_secrets import ApiSecrets
 from PriceProcessor import PriceProcessor
+from CandleScheduler import CandleScheduler
+from ClockSync import ClockSync
 from Strategy import Strategy
+from ring_buffer import SpscRingBuffer
+from CandleCache import CandleCache
+from AccountCache import AccountCache
+from PlanOrderBook import PlanOrderBook
+from ContractRegistry import ContractRegistry
 import json
 import time
 import threading
-from queue import Queue
+from event_mux import WakeQueue
 
 from OrderManager import OrderManager
+from OrderDispatcher import OrderDispatcher
 
 import atexit
 
@@ -29,16 +37,16 @@ class TraderBot():
         self.setup_logs()
 
         
-        self.shared_prices = {symbol: None for symbol in self.trade_settings.keys()}
-        self.price_lock = threading.Lock() 
-        self.price_events = {symbol: threading.Event() for symbol in self.trade_settings.keys()}
+        self.price_buffers = {symbol: SpscRingBuffer() for symbol in self.trade_settings.keys()}
         self.shared_positions = {symbol: None for symbol in self.trade_settings.keys()}
         self.position_lock = threading.Lock() 
         self.position_events = {symbol: threading.Event() for symbol in self.trade_settings.keys()}
         
-        self.price_queue = {symbol: Queue() for symbol in self.trade_settings.keys()}
-        self.candle_queue = {symbol: Queue() for symbol in self.trade_settings.keys()}
-        self.position_queue = {symbol: Queue() for symbol in self.trade_settings.keys()}
+        # Strategies block on these queues, a put wakes the strategy of the symbol
+        self.price_queue = {symbol: WakeQueue() for symbol in self.trade_settings.keys()}
+        self.candle_queue = {symbol: {granularity: WakeQueue() for granularity in settings.granularities}
+                             for symbol, settings in self.trade_settings.items()}
+        self.position_queue = {symbol: WakeQueue() for symbol in self.trade_settings.keys()}
 
         # self.trade_queue = Queue()
 
@@ -46,37 +54,64 @@ class TraderBot():
         
 
         threads = []
+        self.strategies = []
 
 
         # Initialize API client, PriceStreamer and DataManager
         self.api = BitgetClient(self.api_secrets.apiKey, self.api_secrets.secretKey, self.api_secrets.passphrase)
-
-        self.price_streamer = PriceStreamer(self.shared_prices,
-                                            self.price_lock, 
-                                            self.price_events, 
+        # Pooled connections opened before the clock sync and the first orders
+        self.api.warm_up()
+
+        # Candle boundaries, request signing and latencies follow the exchange clock,
+        # resampled in the background so no request waits on the server time
+        self.clock = ClockSync(self.api, shutdown_event=self.shutdown_event)
+        self.clock.sync()
+        self.api.clock = self.clock
+        self.clock.daemon = False
+        threads.append(self.clock)
+        self.clock.start()
+        self.candle_scheduler = CandleScheduler(self.clock, 'CandleScheduler', self.shutdown_event)
+        self.candle_cache = CandleCache()
+        # Shared by all OrderManagers, fed by the websocket account channel
+        self.account_cache = AccountCache(self.api)
+        # Our working trigger orders, fed by the websocket plan order channel
+        self.plan_orders = PlanOrderBook()
+        # One bulk contracts request (or the file cache) before the OrderManagers are built
+        ContractRegistry(self.api).load()
+        # Orders are sent from worker threads, strategies only queue them
+        self.order_dispatcher = OrderDispatcher(self.shutdown_event)
+        self.order_dispatcher.start()
+
+        self.price_streamer = PriceStreamer(self.price_buffers,
                                             self.shared_positions, 
                                             self.position_lock, 
                                             self.position_events, 
                                             self.api_secrets.apiKey, 
                                             self.api_secrets.secretKey, 
-                                            self.api_secrets.passphrase)
+                                            self.api_secrets.passphrase,
+                                            self.account_cache,
+                                            self.plan_orders)
         
         
 
         for pair, pair_setting in self.trade_settings.items():
-            price_processor_t = PriceProcessor(self.shared_prices, 
-                                               self.price_lock, 
-                                               self.price_events, 
+            price_processor_t = PriceProcessor(self.price_buffers[pair],
                                                self.price_queue,
                                                self.candle_queue,                          
                                                f'PriceProcess_{pair}', 
                                                pair, 
-                                               pair_setting.granularity,
-                                               self.shutdown_event
+                                               pair_setting.granularities,
+                                               self.shutdown_event,
+                                               self.clock
                                                )
             price_processor_t.daemon = False
             threads.append(price_processor_t)
+            self.candle_scheduler.register(price_processor_t)
             price_processor_t.start()
+
+        self.candle_scheduler.daemon = False
+        threads.append(self.candle_scheduler)
+        self.candle_scheduler.start()
         
         for pair, pair_setting in self.trade_settings.items():
             position_processor_t = PositionProcessor(self.shared_positions, 
@@ -100,10 +135,13 @@ class TraderBot():
                                             f'StrategyProcess_{pair}', 
                                             pair, 
                                             self.trade_settings[pair],
-                                            self.shutdown_event
+                                            self.shutdown_event,
+                                            self.candle_cache,
+                                            self.order_dispatcher
                                             )
             strategy_processor_t.daemon = False
             threads.append(strategy_processor_t)
+            self.strategies.append(strategy_processor_t)
             strategy_processor_t.start()
 
     def setup_logs(self):
@@ -145,6 +183,8 @@ class TraderBot():
     def shutdown(self):
         print("Shutting down all threads...")
         self.shutdown_event.set()  # Signal all threads to stop
+        for strategy in self.strategies:
+            strategy.waker.notify()
 
         # Clear queues or perform other cleanup here
         # Cancel all orders
@@ -154,6 +194,9 @@ class TraderBot():
             if thread != threading.current_thread():
                 thread.join()
 
+        for line in self.api.rate_limiter.stats():
+            self.log_to_main(line)
+        self.log_to_main(self.api.request_cache.stats())
         print("All threads have been shut down gracefully.")
 
 
@@ -165,9 +208,9 @@ if __name__ == '__main__':
     atexit.register(b.shutdown)  # Register shutdown method to be called on exit
 
     try:
-        # Your main program logic here
-        while True:
-            pass  # Replace with your main loop
+        # Block until shutdown, waking up regularly so KeyboardInterrupt is delivered
+        while not b.shutdown_event.wait(1):
+            pass
     except KeyboardInterrupt:
         print("Received keyboard interrupt, shutting down...")
         b.shutdown()
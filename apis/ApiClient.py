@@ -2,7 +2,7 @@ import ccxt
 import pandas as pd
 import time
 from multiprocessing.pool import ThreadPool as Pool
-import numpy as np
+from apis.market_cache import MarketCache
 
 class BitgetClient:
     def __init__(self, apiKey=None, secret=None, password=None):
@@ -20,7 +20,12 @@ class BitgetClient:
         else:
             self._auth = True
             self._session = ccxt.bitget(bitget_auth_object)
-        self.market = self._session.load_markets()
+        # Markets come from the disk cache on first use, not downloaded here
+        self._markets = MarketCache(self._session)
+
+    @property
+    def market(self):
+        return self._markets.ensure()
 
     def authentication_required(fn):
         """Annotation for methods that require auth."""
@@ -56,29 +61,32 @@ class BitgetClient:
 
     def get_more_last_historical_async(self, symbol, timeframe, limit):
         max_threads = 4
-        pool_size = round(limit/100)  # your "parallelness"
+        page = 100
+        # Pages follow the timeframe, the last one ends with the current candle
+        timeframe_ms = self._session.parse_timeframe(timeframe) * 1000
+        now = round(time.time() * 1000)
+        current = now - now % timeframe_ms
 
         # define worker function before a Pool is instantiated
-        full_result = []
         def worker(i):
             
             try:
                 return self._session.fetch_ohlcv(
-                symbol, timeframe, round(time.time() * 1000) - (i*1000*60*60), limit=100)
+                symbol, timeframe, current - (i - 1) * timeframe_ms, limit=page)
             except Exception as err:
                 raise Exception("Error on last historical on " + symbol + ": " + str(err))
 
         pool = Pool(max_threads)
 
-        full_result = pool.map(worker,range(limit, 0, -100))
-        full_result = np.array(full_result).reshape(-1,6)
-        result = pd.DataFrame(data=full_result)
-        result = result.rename(
-            columns={0: 'timestamp', 1: 'open', 2: 'high', 3: 'low', 4: 'close', 5: 'volume'})
+        # Pages may be short or overlap: concatenated, then deduplicated on the timestamp
+        full_result = [row for rows in pool.map(worker, range(limit, 0, -page)) for row in rows]
+        pool.close()
+        result = pd.DataFrame(data=full_result, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+        result = result.drop_duplicates(subset='timestamp', keep='last')
         result = result.set_index(result['timestamp'])
         result.index = pd.to_datetime(result.index, unit='ms')
         del result['timestamp']
-        return result.sort_index()
+        return result.sort_index().iloc[-limit:]
 
     def get_bid_ask_price(self, symbol):
         try:
@@ -88,12 +96,15 @@ class BitgetClient:
         return {"bid":ticker["bid"],"ask":ticker["ask"]}
 
     def get_min_order_amount(self, symbol):
+        self._markets.ensure()
         return self._session.markets_by_id[symbol]["info"]["minProvideSize"]
 
     def convert_amount_to_precision(self, symbol, amount):
+        self._markets.ensure()
         return self._session.amount_to_precision(symbol, amount)
 
     def convert_price_to_precision(self, symbol, price):
+        self._markets.ensure()
         return self._session.price_to_precision(symbol, price)
 
     @authentication_required
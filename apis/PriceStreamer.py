@@ -1,56 +1,73 @@
-from pybitget.stream import BitgetWsClient, SubscribeReq, handel_error
+from apis.bitget_c.bitget_ws_client import BitgetWsClient, SubscribeReq, handel_error
 from logger import Logger
-from pybitget.enums import *
-from pybitget import logger
-import json
 from models.live_prices import LiveStreamPrice
 from models.live_position import LivePosition
 import threading
+from apis.bitget_c import request_cache
 
 
 class PriceStreamer(threading.Thread):
-    def __init__(self, shared_prices, price_lock: threading.Lock, price_events, shared_positions, position_lock: threading.Lock, position_events,apiKey, secretkey, passphrase):
+    def __init__(self, price_buffers, shared_positions, position_lock: threading.Lock, position_events,apiKey, secretkey, passphrase, account_cache=None, plan_orders=None):
         super().__init__()
-        self.shared_prices = shared_prices  
-        self.price_lock = price_lock        
-        self.price_events = price_events    
+        # One SpscRingBuffer per symbol, this thread is the only producer
+        self.price_buffers = price_buffers
         self.shared_positions = shared_positions  
         self.position_lock = position_lock        
         self.position_events = position_events    
+        self.account_cache = account_cache
+        self.plan_orders = plan_orders
         self.logger = Logger('PriceStreamer')
 
+        # Frames are decoded once by the client and routed by (instType, channel, instId)
         self.ws_client = BitgetWsClient(api_key=apiKey, api_secret=secretkey, passphrase=passphrase) \
+            .listener(self.on_message) \
             .error_listener(handel_error) \
             .build()
         # Subscribe to market channels
-        self.symbols = shared_prices.keys()
+        self.symbols = price_buffers.keys()
         # print(self.symbols)
-        channels = [SubscribeReq("mc", "ticker", symbol) for symbol in self.symbols] #+ [SubscribeReq("umcbl", "ordersAlgo", "default") ]
-        self.ws_client.subscribe(channels, self.on_message)
-    
-    def on_message(self, message):
-
-        data = json.loads(message)
-        
-        if data['action'] == 'snapshot':
-            if data['arg']['channel'] == 'positions':
-                # Extract positions from 'data' (which contains positions information)
-                positions_data = data['data']
-                self.update_positions(positions_data)
-            else:
-            # Extract the first entry from 'data' (which contains price information)
-                price_data = data['data'][0]
-                ts = data['ts']
-                symbol=price_data['instId']
-                tmp_data = dict(ts=ts, symbol=symbol, price=price_data['last'], ask=price_data['bestAsk'], bid=price_data['bestBid'], volume=price_data['baseVolume'])
-                price = LiveStreamPrice(tmp_data)
-                self.update_price(symbol, price)
+        channels = [SubscribeReq("mc", "ticker", symbol) for symbol in self.symbols]
+        self.ws_client.subscribe(channels, self.on_ticker)
+
+        # Private account channel keeps the shared balance cache current
+        if self.account_cache is not None:
+            self.ws_client.subscribe([SubscribeReq("umcbl", "account", "default")], self.on_account)
+        # Private plan order channel keeps the local plan order book current
+        if self.plan_orders is not None:
+            self.ws_client.subscribe([SubscribeReq("umcbl", "ordersAlgo", "default")], self.on_orders_algo)
+
+    def on_ticker(self, data):
+        if data.get('action') != 'snapshot':
+            return
+        # Extract the first entry from 'data' (which contains price information)
+        price_data = data['data'][0]
+        ts = data['ts']
+        symbol=price_data['instId']
+        tmp_data = dict(ts=ts, symbol=symbol, price=price_data['last'], ask=price_data['bestAsk'], bid=price_data['bestBid'], volume=price_data['baseVolume'])
+        price = LiveStreamPrice(tmp_data)
+        self.update_price(symbol, price)
+
+    def on_account(self, data):
+        if data.get('action') == 'snapshot':
+            request_cache.CACHE.invalidate_orders()
+            self.account_cache.on_account(data['data'])
+
+    def on_orders_algo(self, data):
+        if data.get('action') == 'snapshot':
+            request_cache.CACHE.invalidate_orders()
+            self.plan_orders.on_orders_algo(data['data'])
+
+    def on_message(self, data):
+        # Frames without a routed subscription
+        if data.get('action') == 'snapshot' and data.get('arg', {}).get('channel') == 'positions':
+            request_cache.CACHE.invalidate_orders()
+            # Extract positions from 'data' (which contains positions information)
+            positions_data = data['data']
+            self.update_positions(positions_data)
     
     def update_price(self, symbol, price):
-        with self.price_lock:
-            self.shared_prices[symbol] = price
-            # Notify TraderBot that a price update has occurred
-            self.price_events[symbol].set()
+        # Wakes the PriceProcessor of this symbol, drops are counted by the buffer
+        self.price_buffers[symbol].push(price)
 
     def update_positions(self, positions):
         tmp_positions = {symbol: None for symbol in self.symbols} 
@@ -0,0 +1,77 @@
+import asyncio
+import json
+import aiohttp
+from . import consts as c
+from .client import Client
+
+
+class AsyncResponse(object):
+    """Body of an aiohttp response read up front, with the requests.Response bits the error handling uses."""
+
+    def __init__(self, status, headers, text):
+        self.status_code = status
+        self.headers = headers
+        self.text = text
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class AsyncClient(Client):
+    """
+    asyncio variant of Client on one aiohttp session.
+    Signing, pacing and error handling are shared with Client; _request is a
+    coroutine, so every endpoint method of a subclass returns an awaitable.
+    The session is created on first use inside the running event loop.
+    """
+
+    def _new_session(self, pool_size):
+        self.pool_size = pool_size
+        return None
+
+    def _session(self):
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=60)
+            self.session = aiohttp.ClientSession(connector=connector)
+        return self.session
+
+    async def _request(self, method, request_path, params, cursor=False):
+        # Paced per endpoint, signed afterwards so the timestamp is not aged by the wait
+        await self.rate_limiter.acquire_async(method, request_path)
+        if self.clock is None and self.use_server_time:
+            timestamp = int(await self._get_timestamp())
+        else:
+            timestamp = self.now_ms()
+        request_path, url, body, header = self._prepare(method, request_path, params, timestamp)
+
+        data = body if method == c.POST else None
+        async with self._session().request(method, url, data=data, headers=header) as response:
+            response = AsyncResponse(response.status, response.headers, await response.text())
+        return self._handle(response, request_path, cursor)
+
+    async def _request_with_params(self, method, request_path, params, cursor=False, cache=True):
+        # Not read through the request cache, it is shared with the threads
+        if method == c.GET:
+            return await self._request(method, request_path, params, cursor)
+        try:
+            return await self._request(method, request_path, params, cursor)
+        finally:
+            # Same as the sync client, our own orders change the balance, positions and open orders
+            self.request_cache.invalidate_orders(params.get('symbol'))
+
+    async def _get_timestamp(self):
+        url = self.base_url + c.SERVER_TIMESTAMP_URL
+        await self.rate_limiter.acquire_async(c.GET, c.SERVER_TIMESTAMP_URL)
+        async with self._session().get(url) as response:
+            if response.status == 200:
+                return json.loads(await response.text())['data']['serverTime']
+            else:
+                return ""
+
+    async def warm_up(self, connections=4):
+        # Opens `connections` pooled connections in parallel before the first order needs one
+        await asyncio.gather(*[self._get_timestamp() for _ in range(connections)])
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
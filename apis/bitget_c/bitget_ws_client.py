@@ -11,7 +11,8 @@ import websocket
 
 from apis.bitget_c.consts import GET
 from apis.bitget_c import consts as c
-from apis.bitget_c import utils 
+from apis.bitget_c import utils
+from logger import Logger
 
 WS_OP_LOGIN = 'login'
 WS_OP_SUBSCRIBE = "subscribe"
@@ -19,7 +20,7 @@ WS_OP_UNSUBSCRIBE = "unsubscribe"
 
 
 def handle(message):
-    print("default:" + message)
+    print("default:" + str(message))
 
 
 def handel_error(message):
@@ -28,21 +29,23 @@ def handel_error(message):
 
 class BitgetWsClient:
 
-    def __init__(self, need_login=False, url=c.CONTRACT_WS_URL):
+    def __init__(self, need_login=False, url=c.CONTRACT_WS_URL, api_key=None, api_secret=None, passphrase=None):
         utils.check_none(url, "url")
-        self.__need_login = need_login
+        self.__need_login = need_login or (api_key is not None and api_secret is not None and passphrase is not None)
         self.__connection = False
         self.__login_status = False
         self.__reconnect_status = False
-        self.__api_key = None
-        self.__api_secret_key = None
-        self.__passphrase = None
+        self.__api_key = api_key
+        self.__api_secret_key = api_secret
+        self.__passphrase = passphrase
         self.__all_suribe = set()
         self.__listener = handle
         self.__error_listener = handel_error
         self.__url = url
         self.__scribe_map = {}
         self.__allbooks_map = {}
+        # Connection chatter at debug level, in logs/BitgetWsClient.log
+        self.__log = Logger('BitgetWsClient').logger
 
     def build(self):
         self.__ws_client = self.__init_client()
@@ -50,7 +53,7 @@ class BitgetWsClient:
         __thread.start()
 
         while not self.has_connect():
-            print("start connecting... url: ", self.__url)
+            self.__log.debug(f"start connecting... url: {self.__url}")
             time.sleep(1)
 
         if self.__need_login:
@@ -104,7 +107,7 @@ class BitgetWsClient:
             sign = utils.signByRSA(utils.pre_hash(timestamp, GET, c.REQUEST_PATH), self.__api_secret_key)
         ws_login_req = WsLoginReq(self.__api_key, self.__passphrase, str(timestamp), sign)
         self.send_message(WS_OP_LOGIN, [ws_login_req])
-        print("logging in......")
+        self.__log.debug("logging in......")
         while not self.__login_status:
             time.sleep(1)
 
@@ -124,15 +127,20 @@ class BitgetWsClient:
 
     def send_message(self, op, args):
         message = json.dumps(BaseWsReq(op, args), default=lambda o: o.__dict__)
-        print("send message:" + message)
+        # The login request holds the credentials and signature, never written out
+        self.__log.debug(f"send message: {op}" if op == WS_OP_LOGIN else f"send message: {message}")
         self.__ws_client.send(message)
 
+    def route(self, channels, listener):
+        # Pushes of these channels go to listener as the decoded frame dict
+        for channel in channels:
+            channel.inst_type = str(channel.inst_type)
+            self.__scribe_map[channel.key()] = listener
+
     def subscribe(self, channels, listener=None):
 
         if listener:
-            for chanel in channels:
-                chanel.inst_type = str(chanel.inst_type)
-                self.__scribe_map[chanel] = listener
+            self.route(channels, listener)
 
         for channel in channels:
             self.__all_suribe.add(channel)
@@ -141,12 +149,11 @@ class BitgetWsClient:
 
     def unsubscribe(self, channels):
         try:
-            for chanel in channels:
-                if chanel in self.__scribe_map:
-                    del self.__scribe_map[chanel]
+            for channel in channels:
+                self.__scribe_map.pop(channel.key(), None)
 
             for channel in channels:
-                if chanel in self.__all_suribe:
+                if channel in self.__all_suribe:
                     self.__all_suribe.remove(channel)
 
             self.send_message(WS_OP_UNSUBSCRIBE, channels)
@@ -154,15 +161,16 @@ class BitgetWsClient:
             pass
 
     def __on_open(self, ws):
-        print('connection is success....')
+        self.__log.debug('connection is success....')
         self.__connection = True
         self.__reconnect_status = False
 
     def __on_message(self, ws, message):
 
         if message == 'pong':
-            print("Keep connected:" + message)
+            self.__log.debug("Keep connected:" + message)
             return
+        # Parsed once, listeners get the dict
         json_obj = json.loads(message)
         if "code" in json_obj and json_obj.get("code") != 0:
             if self.__error_listener:
@@ -170,7 +178,7 @@ class BitgetWsClient:
                 return
 
         if "event" in json_obj and json_obj.get("event") == "login":
-            print("login msg:" + message)
+            self.__log.debug("login msg:" + message)
             self.__login_status = True
             return
         listenner = None
@@ -181,30 +189,15 @@ class BitgetWsClient:
             listenner = self.get_listener(json_obj)
 
         if listenner:
-            listenner(message)
+            listenner(json_obj)
             return
 
-        self.__listener(message)
-
-    def __dict_books_info(self, dict):
-        return BooksInfo(dict['asks'], dict['bids'], dict['checksum'])
-
-    def __dict_to_subscribe_req(self, dict):
-        if "instId" in dict:
-            instId = dict['instId']
-        else:
-            instId = dict['coin']
-        return SubscribeReq(dict['instType'], dict['channel'], instId)
+        self.__listener(json_obj)
 
     def get_listener(self, json_obj):
-        try:
-            if json_obj.get('arg'):
-                json_str = str(json_obj.get('arg')).replace("\'", "\"")
-                subscribe_req = json.loads(json_str, object_hook=self.__dict_to_subscribe_req)
-                return self.__scribe_map.get(subscribe_req)
-        except Exception as e:
-            print(json_obj.get('arg'), e)
-            pass
+        arg = json_obj.get('arg')
+        if arg:
+            return self.__scribe_map.get(route_key(arg))
 
     def __on_error(self, ws, msg):
         print("error:", msg)
@@ -213,7 +206,7 @@ class BitgetWsClient:
             self.__re_connect()
 
     def __on_close(self, ws, close_status_code, close_msg):
-        print("ws is closeing ......close_status:{},close_msg:{}".format(close_status_code, close_msg))
+        self.__log.debug("ws is closeing ......close_status:{},close_msg:{}".format(close_status_code, close_msg))
         self.__close()
         if not self.__reconnect_status:
             self.__re_connect()
@@ -221,7 +214,7 @@ class BitgetWsClient:
     def __re_connect(self):
         # 重连
         self.__reconnect_status = True
-        print("start reconnection ...")
+        self.__log.debug("start reconnection ...")
         self.build()
         for channel in self.__all_suribe :
             self.subscribe([channel])
@@ -237,32 +230,33 @@ class BitgetWsClient:
         try:
             if "arg" not in json_obj or "action" not in json_obj:
                 return True
-            arg = str(json_obj.get('arg')).replace("\'", "\"")
-            action = str(json_obj.get('action')).replace("\'", "\"")
-            data = str(json_obj.get('data')).replace("\'", "\"")
-
-            subscribe_req = json.loads(arg, object_hook=self.__dict_to_subscribe_req)
-
-            if subscribe_req.channel != "books":
+            arg = json_obj['arg']
+            if arg.get('channel') != "books":
                 return True
 
-            books_info = json.loads(data, object_hook=self.__dict_books_info)[0]
+            action = json_obj['action']
+            key = route_key(arg)
+            book = json_obj['data'][0]
+            books_info = BooksInfo(book['asks'], book['bids'], book['checksum'])
 
             if action == "snapshot":
-                self.__allbooks_map[subscribe_req] = books_info
+                self.__allbooks_map[key] = books_info
                 return True
             if action == "update":
-                all_books = self.__allbooks_map[subscribe_req]
+                all_books = self.__allbooks_map.get(key)
                 if all_books is None:
                     return False
 
                 all_books = all_books.merge(books_info)
                 check_sum = all_books.check_sum(books_info.checksum)
                 if not check_sum:
+                    self.__log.debug(f"checksum mismatch {key}, resubscribing")
+                    subscribe_req = SubscribeReq(*key)
+                    listener = self.__scribe_map.get(key)
                     self.unsubscribe([subscribe_req])
-                    self.subscribe([subscribe_req])
+                    self.subscribe([subscribe_req], listener)
                     return False
-                self.__allbooks_map[subscribe_req] = all_books
+                self.__allbooks_map[key] = all_books
         except Exception as e:
             msg = traceback.format_exc()
             print(msg)
@@ -270,6 +264,11 @@ class BitgetWsClient:
         return True
 
 
+def route_key(arg):
+    # (instType, channel, instId) of a subscription or a push 'arg', instType case insensitive
+    return str(arg.get('instType')).lower(), arg.get('channel'), arg.get('instId', arg.get('coin'))
+
+
 class BooksInfo:
     def __init__(self, asks, bids, checksum):
         self.asks = asks
@@ -311,9 +310,7 @@ class BooksInfo:
                 crc32str = crc32str + self.asks[x][0] + ":" + self.asks[x][1] + ":"
 
         crc32str = crc32str[0:len(crc32str) - 1]
-        print(crc32str)
         merge_num = crc32(bytes(crc32str, encoding="utf8"))
-        print("start checknum mergeVal:" + str(merge_num) + ",checkVal:" + str(new_check_sum)+",checkSin:"+str(self.__signed_int(merge_num)))
         return self.__signed_int(merge_num) == new_check_sum
 
     def __signed_int(self, checknum):
@@ -336,6 +333,9 @@ class SubscribeReq:
     def __hash__(self) -> int:
         return hash(self.inst_type + self.channel + self.inst_id)
 
+    def key(self):
+        return str(self.inst_type).lower(), self.channel, self.inst_id
+
 
 class BaseWsReq:
 
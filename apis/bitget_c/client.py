@@ -1,37 +1,79 @@
 import requests
 import json
-from . import consts as c, utils, exceptions
+import threading
+from requests.adapters import HTTPAdapter
+from . import consts as c, utils, exceptions, rate_limit, request_cache as rc
 
 
 class Client(object):
 
-    def __init__(self, api_key, api_secret_key, passphrase, use_server_time=False, first=False):
+    # Connections kept open, enough for the order workers and strategy threads
+    POOL_SIZE = 16
+
+    def __init__(self, api_key, api_secret_key, passphrase, use_server_time=False, first=False, rate_limiter=None,
+                 pool_size=POOL_SIZE, base_url=c.API_URL, request_cache=None):
 
         self.API_KEY = api_key
         self.API_SECRET_KEY = api_secret_key
         self.PASSPHRASE = passphrase
         self.use_server_time = use_server_time
         self.first = first
+        self.rate_limiter = rate_limiter or rate_limit.LIMITER
+        self.request_cache = request_cache or rc.CACHE
+        self.signer = utils.Signer(api_key, api_secret_key, passphrase)
+        # Exchange clock (ClockSync) used for signing, set once it is synced
+        self.clock = None
+        self.base_url = base_url
+
+        self.session = self._new_session(pool_size)
+
+    def _new_session(self, pool_size):
+        # Keep-alive connections reused across requests and threads, no TCP/TLS handshake per call
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=False)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
 
     def _request(self, method, request_path, params, cursor=False):
+        # Paced per endpoint, signed afterwards so the timestamp is not aged by the wait
+        self.rate_limiter.acquire(method, request_path)
+        request_path, url, body, header = self._prepare(method, request_path, params)
+
+        # send request
+        response = None
         if method == c.GET:
-            request_path = request_path + utils.parse_params_to_str(params)
-        # url
-        url = c.API_URL + request_path
+            response = self.session.get(url, headers=header)
+            # print("response : ",response.text)
+        elif method == c.POST:
+            response = self.session.post(url, data=body, headers=header)
+            # print("response : ",response.text)
+            #response = requests.post(url, json=body, headers=header)
+        elif method == c.DELETE:
+            response = self.session.delete(url, headers=header)
 
-        
-        timestamp = utils.get_timestamp()
+        return self._handle(response, request_path, cursor)
 
-        # sign & header
+    def now_ms(self):
+        # Exchange time from the synced clock, the server is asked only without one
+        if self.clock is not None:
+            return self.clock.now_ms()
         if self.use_server_time:
-            
-            timestamp = self._get_timestamp()
+            return int(self._get_timestamp())
+        return utils.get_timestamp()
 
-        body = json.dumps(params) if method == c.POST else ""
-        sign = utils.sign(utils.pre_hash(timestamp, method, request_path, str(body)), self.API_SECRET_KEY)
-        if c.SIGN_TYPE == c.RSA:
-            sign = utils.signByRSA(utils.pre_hash(timestamp, method, request_path, str(body)), self.API_SECRET_KEY)
-        header = utils.get_header(self.API_KEY, sign, timestamp, self.PASSPHRASE)
+    def _prepare(self, method, request_path, params, timestamp=None):
+        # Returns the signed (request_path, url, body, header)
+        if timestamp is None:
+            timestamp = self.now_ms()
+        if method == c.GET:
+            request_path = request_path + self.signer.query(params)
+        # url
+        url = self.base_url + request_path
+
+        # sign & header
+        body = self.signer.body(params) if method == c.POST else ""
+        header = self.signer.headers(timestamp, method, request_path, body)
 
         if self.first:
             print("url:", url)
@@ -40,36 +82,21 @@ class Client(object):
             print("headers:", header)
             # print("sign:", sign)
             self.first = False
+        return request_path, url, body, header
 
-
-
-
-        # send request
-        response = None
-        if method == c.GET:
-            response = requests.get(url, headers=header)
-            # print("response : ",response.text)
-        elif method == c.POST:
-            response = requests.post(url, data=body, headers=header)
-            # print("response : ",response.text)
-            #response = requests.post(url, json=body, headers=header)
-        elif method == c.DELETE:
-            response = requests.delete(url, headers=header)
-
+    def _handle(self, response, request_path, cursor=False):
         # print("status:", response.status_code)
         # exception handle
+        if response.status_code == 429:
+            self.rate_limiter.on_rejected(request_path)
         if not str(response.status_code).startswith('2'):
             raise exceptions.BitgetAPIException(response)
         try:
-            res_header = response.headers
             if cursor:
-                r = dict()
-                try:
-                    r['before'] = res_header['OK-BEFORE']
-                    r['after'] = res_header['OK-AFTER']
-                except:
-                    pass
-                return response.json(), r
+                # Bitget v2 history endpoints return their cursor as data.endId
+                body = response.json()
+                data = body.get('data')
+                return body, {'endId': data.get('endId') if isinstance(data, dict) else None}
             else:
                 return response.json()
 
@@ -79,13 +106,34 @@ class Client(object):
     def _request_without_params(self, method, request_path):
         return self._request(method, request_path, {})
 
-    def _request_with_params(self, method, request_path, params, cursor=False):
-        return self._request(method, request_path, params, cursor)
+    def _request_with_params(self, method, request_path, params, cursor=False, cache=True):
+        if method == c.GET and not cursor and cache and self.request_cache.cacheable(request_path, params):
+            return self.request_cache.get(request_path, params,
+                                          lambda: self._request(method, request_path, params))
+        if method == c.GET:
+            return self._request(method, request_path, params, cursor)
+        try:
+            return self._request(method, request_path, params, cursor)
+        finally:
+            # Our own orders change the balance, positions and open orders
+            self.request_cache.invalidate_orders(params.get('symbol'))
 
     def _get_timestamp(self):
-        url = c.API_URL + c.SERVER_TIMESTAMP_URL
-        response = requests.get(url)
+        url = self.base_url + c.SERVER_TIMESTAMP_URL
+        self.rate_limiter.acquire(c.GET, c.SERVER_TIMESTAMP_URL)
+        response = self.session.get(url)
         if response.status_code == 200:
-            return response.json()['timestamp']
+            return response.json()['data']['serverTime']
         else:
-            return ""
\ No newline at end of file
+            return ""
+
+    def warm_up(self, connections=4):
+        # Opens `connections` pooled connections in parallel before the first order needs one
+        threads = [threading.Thread(target=self._get_timestamp) for _ in range(connections)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def close(self):
+        self.session.close()
\ No newline at end of file
@@ -1,5 +1,6 @@
 # Base Url
 API_URL = 'https://api.bitget.com'
+SERVER_TIMESTAMP_URL = '/api/v2/public/time'
 CONTRACT_WS_URL = 'wss://ws.bitget.com/mix/v1/stream'
 
 # http header
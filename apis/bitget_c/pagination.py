@@ -0,0 +1,140 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+# Largest page each endpoint accepts
+ORDERS_PAGE = 100
+CANDLES_PAGE = 1000
+HISTORY_CANDLES_PAGE = 200
+
+
+def pages(fetch_page, cursor=None, prefetch=False):
+    """
+    Yields the pages of fetch_page(cursor) -> (records, next_cursor), until next_cursor is None.
+    With prefetch the next page is requested on a background thread while the
+    current one is consumed, so at most two pages are held in memory.
+    """
+    if not prefetch:
+        while True:
+            records, cursor = fetch_page(cursor)
+            yield records
+            if cursor is None:
+                return
+
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix='prefetch') as pool:
+        future = pool.submit(fetch_page, cursor)
+        while future is not None:
+            records, cursor = future.result()
+            future = pool.submit(fetch_page, cursor) if cursor is not None else None
+            yield records
+
+
+def records(fetch_page, cursor=None, prefetch=False):
+    # Same as pages, one record at a time
+    for page in pages(fetch_page, cursor, prefetch):
+        yield from page
+
+
+async def async_pages(fetch_page, cursor=None, prefetch=False):
+    # pages for a coroutine fetch_page, the prefetched page is a task on the running loop
+    if not prefetch:
+        while True:
+            records, cursor = await fetch_page(cursor)
+            yield records
+            if cursor is None:
+                return
+
+    task = asyncio.ensure_future(fetch_page(cursor))
+    try:
+        while task is not None:
+            records, cursor = await task
+            task = asyncio.ensure_future(fetch_page(cursor)) if cursor is not None else None
+            yield records
+    finally:
+        if task is not None:
+            task.cancel()
+
+
+async def async_records(fetch_page, cursor=None, prefetch=False):
+    async for page in async_pages(fetch_page, cursor, prefetch):
+        for record in page:
+            yield record
+
+
+def _id_params(params, cursor):
+    return dict(params, idLessThan=cursor) if cursor is not None else params
+
+
+def _id_page(response, list_key, limit, cursor):
+    data = response['data'] or {}
+    items = data.get(list_key) or []
+    end_id = data.get('endId')
+    if len(items) < limit or not end_id or end_id == cursor:
+        end_id = None
+    return items, end_id
+
+
+def id_cursor(request, params, list_key, limit=ORDERS_PAGE):
+    """
+    fetch_page for the order/fill history endpoints, newest first: each page
+    holds the records older than the `endId` returned with the previous one.
+    """
+    params = dict(params, limit=str(limit))
+
+    def fetch_page(cursor):
+        return _id_page(request(_id_params(params, cursor)), list_key, limit, cursor)
+
+    return fetch_page
+
+
+def async_id_cursor(request, params, list_key, limit=ORDERS_PAGE):
+    # id_cursor for a request returning an awaitable
+    params = dict(params, limit=str(limit))
+
+    async def fetch_page(cursor):
+        return _id_page(await request(_id_params(params, cursor)), list_key, limit, cursor)
+
+    return fetch_page
+
+
+def _time_window(params, start_ms, end_ms, length_ms, limit, cursor):
+    # (page params, window start, window end), None once past end_ms
+    start = start_ms if cursor is None else cursor
+    if start >= end_ms:
+        return None
+    end = min(start + limit * length_ms, end_ms)
+    page_params = dict(params, startTime=str(start), endTime=str(end - 1),
+                       limit=str((end - start + length_ms - 1) // length_ms))
+    return page_params, start, end
+
+
+def _time_page(response, start, end, end_ms):
+    rows = [row for row in response['data'] if start <= int(row[0]) < end]
+    rows.sort(key=lambda row: int(row[0]))
+    return rows, end if end < end_ms else None
+
+
+def time_cursor(request, params, start_ms, end_ms, length_ms, limit=CANDLES_PAGE):
+    """
+    fetch_page for the candle endpoints, oldest first: candles opened in
+    [start_ms, end_ms) in windows of `limit` candles, the cursor is the next window start.
+    """
+    def fetch_page(cursor):
+        window = _time_window(params, start_ms, end_ms, length_ms, limit, cursor)
+        if window is None:
+            return [], None
+        page_params, start, end = window
+        return _time_page(request(page_params), start, end, end_ms)
+
+    return fetch_page
+
+
+def async_time_cursor(request, params, start_ms, end_ms, length_ms, limit=CANDLES_PAGE):
+    # time_cursor for a request returning an awaitable
+    async def fetch_page(cursor):
+        window = _time_window(params, start_ms, end_ms, length_ms, limit, cursor)
+        if window is None:
+            return [], None
+        page_params, start, end = window
+        return _time_page(await request(page_params), start, end, end_ms)
+
+    return fetch_page
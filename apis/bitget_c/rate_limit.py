@@ -0,0 +1,187 @@
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from models.latency_stats import LatencyStats
+
+# Bitget published limits in requests per second, per endpoint (UID or IP)
+LIMITS = {
+    '/api/v2/public/time': 20,
+    '/api/v2/mix/market/contracts': 20,
+    '/api/v2/mix/market/merge-depth': 20,
+    '/api/v2/mix/market/tickers': 20,
+    '/api/v2/mix/market/candles': 20,
+    '/api/v2/mix/market/history-candles': 20,
+    '/api/v2/mix/account/account': 10,
+    '/api/v2/mix/account/accounts': 10,
+    '/api/v2/mix/account/set-leverage': 5,
+    '/api/v2/mix/account/set-margin': 5,
+    '/api/v2/mix/account/set-margin-mode': 5,
+    '/api/v2/mix/account/set-position-mode': 5,
+    '/api/v2/mix/account/open-count': 20,
+    '/api/v2/mix/position/single-position': 10,
+    '/api/v2/mix/position/all-position': 5,
+    '/api/v2/mix/order/place-order': 10,
+    '/api/v2/mix/order/click-backhand': 5,
+    '/api/v2/mix/order/batch-place-order': 5,
+    '/api/v2/mix/order/cancel-order': 10,
+    '/api/v2/mix/order/batch-cancel-orders': 10,
+    '/api/v2/mix/order/close-positions': 1,
+    '/api/v2/mix/order/orders-history': 10,
+    '/api/v2/mix/order/orders-pending': 10,
+    '/api/v2/mix/order/detail': 10,
+    '/api/v2/mix/order/fills': 10,
+    '/api/v2/mix/order/place-plan-order': 10,
+    '/api/v2/mix/order/modify-plan-order': 10,
+    '/api/v2/mix/order/cancel-plan-order': 10,
+    '/api/v2/mix/order/orders-plan-pending': 10,
+    '/api/v2/mix/order/orders-plan-history': 10,
+}
+DEFAULT_LIMIT = 10
+# Per IP, all endpoints together: 6000 requests per minute
+GLOBAL_LIMIT = 100
+
+# Lower goes first: cancels and amendments, then new orders, then queries
+URGENT = 0
+ORDER = 1
+QUERY = 2
+PRIORITY_NAMES = {URGENT: 'urgent', ORDER: 'order', QUERY: 'query'}
+
+
+def priority_for(method, path):
+    if method == 'GET':
+        return QUERY
+    if 'cancel' in path or 'modify' in path or 'close-positions' in path:
+        return URGENT
+    return ORDER
+
+
+class TokenBucket:
+    """`rate` tokens per second, holding at most `capacity` (one second worth by default)."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or rate)
+        self.tokens = self.capacity
+        self.last = time.monotonic()
+
+    def refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+
+    def wait_time(self):
+        # Seconds until a token is available, 0 when there is one
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def empty(self):
+        self.tokens = 0.0
+
+
+class RateLimiter:
+    """
+    Client side pacing of the REST requests with one token bucket per endpoint
+    and a global bucket for the IP limit.
+    Waiting requests are served by priority (cancels/amendments, orders, queries)
+    then arrival order; a waiter only lets higher priority waiters go first when
+    their endpoint has a token, so an exhausted endpoint never stalls the others.
+    """
+
+    def __init__(self, limits=LIMITS, default=DEFAULT_LIMIT, global_limit=GLOBAL_LIMIT):
+        self.limits = limits
+        self.default = default
+        self.buckets = {}
+        self.global_bucket = TokenBucket(global_limit)
+        self.condition = threading.Condition()
+        self.waiters = []
+        self.sequence = itertools.count()
+        self.wait_stats = {p: LatencyStats(f'{name} rate limit wait') for p, name in PRIORITY_NAMES.items()}
+        self.rejections = 0
+
+    def _bucket(self, path):
+        if path not in self.buckets:
+            self.buckets[path] = TokenBucket(self.limits.get(path, self.default))
+        return self.buckets[path]
+
+    def _refill(self):
+        now = time.monotonic()
+        self.global_bucket.refill(now)
+        for bucket in self.buckets.values():
+            bucket.refill(now)
+
+    def _blocked_by(self, waiter):
+        # A higher priority waiter that could be sent right now
+        for other in self.waiters:
+            if other < waiter and self._bucket(other[2]).tokens >= 1:
+                return True
+        return False
+
+    def _enqueue(self, method, path):
+        path = path.split('?')[0]
+        waiter = (priority_for(method, path), next(self.sequence), path)
+        with self.condition:
+            heapq.heappush(self.waiters, waiter)
+        return waiter
+
+    def _try_take(self, waiter):
+        # Called with the condition held, 0 when the tokens were taken, else the seconds to wait
+        bucket = self._bucket(waiter[2])
+        self._refill()
+        if bucket.tokens >= 1 and self.global_bucket.tokens >= 1 and not self._blocked_by(waiter):
+            bucket.tokens -= 1
+            self.global_bucket.tokens -= 1
+            self.waiters.remove(waiter)
+            heapq.heapify(self.waiters)
+            self.condition.notify_all()
+            return 0.0
+        return max(bucket.wait_time(), self.global_bucket.wait_time(), 0.001)
+
+    def acquire(self, method, path):
+        # Blocks until the request may be sent, returns the time waited in ms
+        started = time.perf_counter()
+        waiter = self._enqueue(method, path)
+        with self.condition:
+            while True:
+                wait = self._try_take(waiter)
+                if not wait:
+                    break
+                self.condition.wait(wait)
+        waited = (time.perf_counter() - started) * 1000
+        self.wait_stats[waiter[0]].record(waited)
+        return waited
+
+    async def acquire_async(self, method, path):
+        # Same as acquire without blocking the event loop
+        started = time.perf_counter()
+        waiter = self._enqueue(method, path)
+        try:
+            while True:
+                with self.condition:
+                    wait = self._try_take(waiter)
+                if not wait:
+                    break
+                await asyncio.sleep(wait)
+        except asyncio.CancelledError:
+            # A cancelled task must not keep its place ahead of the others
+            with self.condition:
+                if waiter in self.waiters:
+                    self.waiters.remove(waiter)
+                    heapq.heapify(self.waiters)
+                    self.condition.notify_all()
+            raise
+        waited = (time.perf_counter() - started) * 1000
+        self.wait_stats[waiter[0]].record(waited)
+        return waited
+
+    def on_rejected(self, path):
+        # The exchange answered 429, nothing more is sent on that endpoint until it refills
+        with self.condition:
+            self.rejections += 1
+            self._bucket(path.split('?')[0]).empty()
+
+    def stats(self):
+        return [str(s) for s in self.wait_stats.values()] + [f'rate limit rejections: {self.rejections}']
+
+
+# Shared by every client, the limits are per account and IP
+LIMITER = RateLimiter()
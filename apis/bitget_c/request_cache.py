@@ -0,0 +1,138 @@
+import threading
+import time
+from collections import OrderedDict
+
+# Seconds a GET answer is reused, per endpoint; endpoints not listed are never cached
+TTLS = {
+    '/api/v2/mix/market/contracts': 3600,
+    '/api/v2/mix/market/tickers': 1,
+    '/api/v2/mix/market/candles': 5,
+    '/api/v2/mix/market/history-candles': 60,
+    '/api/v2/mix/account/account': 2,
+    '/api/v2/mix/account/accounts': 2,
+    '/api/v2/mix/account/open-count': 5,
+    '/api/v2/mix/position/single-position': 1,
+    '/api/v2/mix/position/all-position': 1,
+    '/api/v2/mix/order/orders-pending': 1,
+    '/api/v2/mix/order/orders-plan-pending': 1,
+    '/api/v2/mix/order/detail': 1,
+}
+
+# Answers changed by our own orders and fills
+ORDER_STATE = (
+    '/api/v2/mix/account/',
+    '/api/v2/mix/position/',
+    '/api/v2/mix/order/orders-pending',
+    '/api/v2/mix/order/orders-plan-pending',
+    '/api/v2/mix/order/detail',
+)
+
+# Paging through a time range, each window is asked for once
+TIME_WINDOW = ('startTime', 'endTime')
+
+MAX_ENTRIES = 1024
+
+
+class InFlight:
+    """A request being sent, the callers asking for the same thing wait for its answer."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class RequestCache:
+    """
+    Read-through cache of GET answers keyed by endpoint and parameters.
+    While a request is in flight, callers asking for the same key wait for it
+    instead of sending their own (single flight); a failed request is shared
+    with them and not cached.
+    Expired answers are dropped when a new one is stored, and at most
+    `max_entries` are kept, the least recently used going first.
+    """
+
+    def __init__(self, ttls=TTLS, max_entries=MAX_ENTRIES):
+        self.ttls = ttls
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.in_flight = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def cacheable(self, path, params=None):
+        return path in self.ttls and not (params and any(k in params for k in TIME_WINDOW))
+
+    def get(self, path, params, fetch):
+        key = (path, tuple(sorted((k, str(v)) for k, v in params.items())))
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                self.hits += 1
+                self.entries.move_to_end(key)
+                return entry[0]
+            flight = self.in_flight.get(key)
+            if flight is None:
+                self.misses += 1
+                flight = self.in_flight[key] = InFlight()
+                owner = True
+            else:
+                self.coalesced += 1
+                owner = False
+
+        if not owner:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fetch()
+            with self.lock:
+                # Not stored when invalidated while in flight
+                if self.in_flight.get(key) is flight:
+                    self._store(key, flight.result, time.monotonic() + self.ttls[path])
+            return flight.result
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self.lock:
+                if self.in_flight.get(key) is flight:
+                    del self.in_flight[key]
+            flight.done.set()
+
+    def _store(self, key, result, expires):
+        # Under the lock
+        now = time.monotonic()
+        for k in [k for k, entry in self.entries.items() if entry[1] <= now]:
+            del self.entries[k]
+        self.entries[key] = (result, expires)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def invalidate(self, prefixes=None, symbol=None):
+        # Drops the answers of the endpoints starting with one of the prefixes (all when None),
+        # only those asked for `symbol` (or for every symbol) when given
+        with self.lock:
+            for cache in (self.entries, self.in_flight):
+                for key in list(cache):
+                    path, params = key
+                    if prefixes is not None and not path.startswith(tuple(prefixes)):
+                        continue
+                    if symbol is not None and dict(params).get('symbol', symbol) != symbol:
+                        continue
+                    del cache[key]
+
+    def invalidate_orders(self, symbol=None):
+        self.invalidate(ORDER_STATE, symbol)
+
+    def stats(self):
+        return f'request cache: hits={self.hits}, misses={self.misses}, coalesced={self.coalesced}'
+
+
+# Shared by every client, like the rate limiter
+CACHE = RequestCache()
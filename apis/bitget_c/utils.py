@@ -1,5 +1,6 @@
 import base64
 import hmac
+import json
 import time
 
 from Crypto.Hash import SHA256
@@ -8,6 +9,9 @@ from Crypto.Signature import PKCS1_v1_5 as pk
 
 from . import consts as c
 
+# Built once, json.dumps with separators builds a new encoder on every call
+_compact_json = json.JSONEncoder(separators=(',', ':')).encode
+
 
 def sign(message, secret_key):
     mac = hmac.new(bytes(secret_key, encoding='utf8'), bytes(message, encoding='utf-8'), digestmod='sha256')
@@ -22,6 +26,54 @@ def signByRSA(message, secret_key):
     return str(base64.b64encode(sign), 'utf8')
 
 
+class Signer(object):
+    """
+    Request signing with the key prepared once: the HMAC is keyed at creation and
+    copied per message, an RSA key is parsed once. Also builds the query string,
+    the JSON body and the headers of a request.
+    """
+
+    def __init__(self, api_key, secret_key, passphrase, sign_type=c.SIGN_TYPE):
+        self.sign_type = sign_type
+        if sign_type == c.RSA:
+            self.rsa = pk.new(RSA.importKey(secret_key))
+        else:
+            self.hmac = hmac.new(secret_key.encode('utf-8'), digestmod='sha256')
+        self.header = {
+            c.CONTENT_TYPE: c.APPLICATION_JSON,
+            c.OK_ACCESS_KEY: api_key,
+            c.OK_ACCESS_PASSPHRASE: passphrase,
+            c.LOCALE: 'en-US',
+        }
+
+    def sign(self, message):
+        if self.sign_type == c.RSA:
+            d = self.rsa.sign(SHA256.new(message.encode('utf-8')))
+        else:
+            mac = self.hmac.copy()
+            mac.update(message.encode('utf-8'))
+            d = mac.digest()
+        return base64.b64encode(d).decode('utf-8')
+
+    @staticmethod
+    def query(params):
+        # Same string as parse_params_to_str
+        if not params:
+            return ''
+        return '?' + '&'.join([f'{key}={params[key]}' for key in sorted(params)])
+
+    @staticmethod
+    def body(params):
+        return _compact_json(params)
+
+    def headers(self, timestamp, method, request_path, body=''):
+        timestamp = str(timestamp)
+        header = self.header.copy()
+        header[c.OK_ACCESS_SIGN] = self.sign(timestamp + method.upper() + request_path + body)
+        header[c.OK_ACCESS_TIMESTAMP] = timestamp
+        return header
+
+
 def pre_hash(timestamp, method, request_path, body = ""):
     return str(timestamp) + str.upper(method) + request_path + body
 
@@ -1,11 +1,15 @@
 
 from .bitget_c.client import Client
-from .bitget_c.consts import GET, POST
+from .bitget_c.async_client import AsyncClient
+from .bitget_c.consts import GET, POST, API_URL
+from .bitget_c import pagination
 
 
 class BitgetClient(Client):
-    def __init__(self, api_key, api_secret_key, passphrase, use_server_time=False, first=False):
-        Client.__init__(self, api_key, api_secret_key, passphrase, use_server_time, first)
+    def __init__(self, api_key, api_secret_key, passphrase, use_server_time=False, first=False, rate_limiter=None,
+                 pool_size=Client.POOL_SIZE, base_url=API_URL, request_cache=None):
+        Client.__init__(self, api_key, api_secret_key, passphrase, use_server_time, first, rate_limiter,
+                        pool_size, base_url, request_cache)
     
     #----------- ACCOUNT -----------#
 
@@ -38,8 +42,8 @@ class BitgetClient(Client):
     
     #----------- MARKET -----------#
 
-    def contracts(self, params):
-        return self._request_with_params(GET, '/api/v2/mix/market/contracts', params)
+    def contracts(self, params, cache=True):
+        return self._request_with_params(GET, '/api/v2/mix/market/contracts', params, cache=cache)
 
     def orderbook(self, params):
         return self._request_with_params(GET, '/api/v2/mix/market/orderbook', params)
@@ -50,8 +54,20 @@ class BitgetClient(Client):
     def fills(self, params):
         return self._request_with_params(GET, '/api/v2/mix/market/fills', params)
 
-    def candles(self, params):
-        return self._request_with_params(GET, '/api/v2/mix/market/candles', params)
+    def candles(self, params, cache=True):
+        return self._request_with_params(GET, '/api/v2/mix/market/candles', params, cache=cache)
+
+    def historyCandles(self, params, cache=True):
+        return self._request_with_params(GET, '/api/v2/mix/market/history-candles', params, cache=cache)
+
+    def iterCandles(self, params, start_ms, end_ms, length_ms, history=False, prefetch=False):
+        # Candle rows opened in [start_ms, end_ms), oldest first, one window request at a time
+        if history:
+            fetch_page = pagination.time_cursor(self.historyCandles, params, start_ms, end_ms, length_ms,
+                                                pagination.HISTORY_CANDLES_PAGE)
+        else:
+            fetch_page = pagination.time_cursor(self.candles, params, start_ms, end_ms, length_ms)
+        return pagination.records(fetch_page, prefetch=prefetch)
     
     #----------- ORDER -----------#
 
@@ -88,6 +104,9 @@ class BitgetClient(Client):
     def placePlanOrder(self, params):
         return self._request_with_params(POST, '/api/v2/mix/order/place-plan-order', params)
 
+    def modifyPlanOrder(self, params):
+        return self._request_with_params(POST, '/api/v2/mix/order/modify-plan-order', params)
+
     def cancelPlanOrder(self, params):
         return self._request_with_params(POST, '/api/v2/mix/order/cancel-plan-order', params)
 
@@ -97,6 +116,20 @@ class BitgetClient(Client):
     def ordersPlanHistory(self, params):
         return self._request_with_params(GET, '/api/v2/mix/order/orders-plan-history', params)
 
+    #----------- PAGINATED HISTORY, newest first -----------#
+
+    def iterOrdersHistory(self, params, prefetch=False):
+        fetch_page = pagination.id_cursor(self.ordersHistory, params, 'entrustedList')
+        return pagination.records(fetch_page, prefetch=prefetch)
+
+    def iterOrdersPlanHistory(self, params, prefetch=False):
+        fetch_page = pagination.id_cursor(self.ordersPlanHistory, params, 'entrustedList')
+        return pagination.records(fetch_page, prefetch=prefetch)
+
+    def iterFills(self, params, prefetch=False):
+        fetch_page = pagination.id_cursor(self.fills, params, 'fillList')
+        return pagination.records(fetch_page, prefetch=prefetch)
+
     def traderOrderClosePositions(self, params):
         return self._request_with_params(POST, '/api/v2/copy/mix-trader/order-close-positions', params)
 
@@ -105,5 +138,39 @@ class BitgetClient(Client):
 
     def traderOrderHistoryTrack(self, params):
         return self._request_with_params(GET, '/api/v2/copy/mix-trader/order-history-track', params)
-    
 
+
+class AsyncBitgetClient(AsyncClient, BitgetClient):
+    """
+    Same endpoints as BitgetClient, every call returns an awaitable:
+
+        api = AsyncBitgetClient(key, secret, passphrase)
+        tickers, account = await asyncio.gather(api.tickers(params), api.account(params))
+    """
+
+    def __init__(self, api_key, api_secret_key, passphrase, use_server_time=False, first=False, rate_limiter=None,
+                 pool_size=Client.POOL_SIZE, base_url=API_URL, request_cache=None):
+        AsyncClient.__init__(self, api_key, api_secret_key, passphrase, use_server_time, first, rate_limiter,
+                             pool_size, base_url, request_cache)
+
+    # Paginated reads as async generators: async for row in api.iterCandles(...)
+
+    def iterCandles(self, params, start_ms, end_ms, length_ms, history=False, prefetch=False):
+        if history:
+            fetch_page = pagination.async_time_cursor(self.historyCandles, params, start_ms, end_ms, length_ms,
+                                                      pagination.HISTORY_CANDLES_PAGE)
+        else:
+            fetch_page = pagination.async_time_cursor(self.candles, params, start_ms, end_ms, length_ms)
+        return pagination.async_records(fetch_page, prefetch=prefetch)
+
+    def iterOrdersHistory(self, params, prefetch=False):
+        fetch_page = pagination.async_id_cursor(self.ordersHistory, params, 'entrustedList')
+        return pagination.async_records(fetch_page, prefetch=prefetch)
+
+    def iterOrdersPlanHistory(self, params, prefetch=False):
+        fetch_page = pagination.async_id_cursor(self.ordersPlanHistory, params, 'entrustedList')
+        return pagination.async_records(fetch_page, prefetch=prefetch)
+
+    def iterFills(self, params, prefetch=False):
+        fetch_page = pagination.async_id_cursor(self.fills, params, 'fillList')
+        return pagination.async_records(fetch_page, prefetch=prefetch)
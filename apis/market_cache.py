@@ -0,0 +1,84 @@
+import json
+import os
+import threading
+import time
+
+CACHE_FILE = './cache/markets_{}.json'
+
+
+class MarketCache:
+    """
+    ccxt market catalogue persisted to disk so a client starts without downloading it.
+    Loaded on first use: from the file when there is one, even expired. Once
+    expired (on load or later in a long running process) it is refreshed on a
+    background thread. Only the very first run, with no file, waits for the download.
+    """
+
+    TTL = 24 * 60 * 60
+    # Wait before trying again after a failed refresh
+    RETRY = 60
+
+    def __init__(self, session, ttl=TTL, path=None):
+        self.session = session
+        self.ttl = ttl
+        self.path = path or CACHE_FILE.format(session.id)
+        self.loaded = False
+        self.refreshing = False
+        # time.time() after which the markets are refreshed
+        self.expires = 0
+        self.lock = threading.Lock()
+
+    def _read_file(self):
+        # (markets, currencies, age in seconds), None without a readable file
+        try:
+            with open(self.path, 'r') as f:
+                data = json.loads(f.read())
+            return data['markets'], data['currencies'], time.time() - os.path.getmtime(self.path)
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _write_file(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f'{self.path}.tmp'
+        with open(tmp, 'w') as f:
+            f.write(json.dumps({'markets': self.session.markets, 'currencies': self.session.currencies}, default=str))
+        os.replace(tmp, self.path)
+
+    def refresh(self):
+        expires = time.time() + self.RETRY
+        try:
+            self.session.load_markets(reload=True)
+            self._write_file()
+            expires = time.time() + self.ttl
+        except Exception as e:
+            print(f"Market refresh failed: {e}")
+        finally:
+            with self.lock:
+                self.expires = expires
+                self.refreshing = False
+
+    def _refresh_in_background(self):
+        # Under the lock, at most one refresh at a time
+        if not self.refreshing:
+            self.refreshing = True
+            threading.Thread(target=self.refresh, name='MarketCacheRefresh', daemon=True).start()
+
+    def ensure(self):
+        # Markets ready on the session, no network unless nothing was ever cached
+        if self.loaded and time.time() < self.expires:
+            return self.session.markets
+        with self.lock:
+            if not self.loaded:
+                cached = self._read_file()
+                if cached is None:
+                    self.session.load_markets()
+                    self._write_file()
+                    self.expires = time.time() + self.ttl
+                else:
+                    markets, currencies, age = cached
+                    self.session.set_markets(markets, currencies)
+                    self.expires = time.time() + self.ttl - age
+                self.loaded = True
+            if time.time() >= self.expires:
+                self._refresh_in_background()
+        return self.session.markets
@@ -0,0 +1,149 @@
+"""
+Parity and concurrency of AsyncBitgetClient against BitgetClient on a local mock server.
+
+    python -m benchmarks.bench_async_client [--delay-ms 20]
+
+The mock checks the signature of every request and echoes what it received.
+Each endpoint is then called through both clients and must give the same
+answer, errors included. Then one tickers query per symbol is timed: one
+after the other with the sync client, together on one event loop with the
+async client. Each answer is delayed by --delay-ms.
+"""
+import argparse
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from apis.bitget_client import BitgetClient, AsyncBitgetClient
+from apis.bitget_c import utils
+from apis.bitget_c.exceptions import BitgetAPIException
+from apis.bitget_c.rate_limit import RateLimiter
+
+KEY, SECRET, PASSPHRASE = 'key', 'secret', 'passphrase'
+SYMBOLS = 20
+
+CALLS = [
+    ('account', {'symbol': 'BTCUSDT', 'productType': 'USDT-FUTURES', 'marginCoin': 'USDT'}),
+    ('contracts', {'productType': 'USDT-FUTURES'}),
+    ('candles', {'symbol': 'BTCUSDT', 'productType': 'USDT-FUTURES', 'granularity': '1m', 'limit': 100}),
+    ('ordersPlanPending', {'symbol': 'BTCUSDT', 'productType': 'USDT-FUTURES', 'planType': 'normal_plan'}),
+    ('placePlanOrder', {'symbol': 'BTCUSDT', 'productType': 'USDT-FUTURES', 'side': 'buy', 'triggerPrice': '1.5'}),
+    ('modifyPlanOrder', {'symbol': 'BTCUSDT', 'orderId': '1', 'newTriggerPrice': '1.6'}),
+    ('batchCancelOrders', {'symbol': 'BTCUSDT', 'orderIdList': [{'orderId': '1'}, {'orderId': '2'}]}),
+]
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    delay_ms = 0.0
+
+    def respond(self):
+        length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(length).decode() if length else ''
+        if self.path.startswith('/api/v2/public/time'):
+            status, answer = 200, {'code': '00000', 'data': {'serverTime': str(utils.get_timestamp())}}
+        elif self.path.startswith('/fail'):
+            status, answer = 400, {'code': '40034', 'msg': 'Parameter does not exist'}
+        else:
+            time.sleep(self.delay_ms / 1000)
+            message = utils.pre_hash(self.headers['ACCESS-TIMESTAMP'], self.command, self.path, body)
+            status, answer = 200, {'code': '00000', 'data': {
+                'method': self.command,
+                'path': self.path,
+                'body': json.loads(body) if body else None,
+                'signed': self.headers['ACCESS-SIGN'] == utils.sign(message, SECRET),
+            }}
+        payload = json.dumps(answer).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = respond
+    do_POST = respond
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MockServer(ThreadingHTTPServer):
+    # Room for all the concurrent connects, the default backlog of 5 drops SYNs (1s retry)
+    request_queue_size = 128
+
+
+def check(name, sync_result, async_result):
+    status = 'ok' if sync_result == async_result else 'MISMATCH'
+    print(f'{name:20s} {status}')
+    if status != 'ok':
+        print(f'  sync : {sync_result}\n  async: {async_result}')
+    return status == 'ok'
+
+
+def call_sync(fn):
+    try:
+        return fn()
+    except BitgetAPIException as e:
+        return str(e)
+
+
+async def call_async(fn):
+    try:
+        return await fn()
+    except BitgetAPIException as e:
+        return str(e)
+
+
+async def run_async(api: AsyncBitgetClient, symbols):
+    results = [await call_async(lambda: getattr(api, name)(params)) for name, params in CALLS]
+    failed = await call_async(lambda: api._request_with_params('GET', '/fail', {}))
+
+    start = time.perf_counter()
+    await asyncio.gather(*[api.tickers({'symbol': s, 'productType': 'USDT-FUTURES'}) for s in symbols])
+    elapsed = time.perf_counter() - start
+    await api.close()
+    return results, failed, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--delay-ms', type=float, default=20.0)
+    args = parser.parse_args()
+
+    MockHandler.delay_ms = args.delay_ms
+    server = MockServer(('127.0.0.1', 0), MockHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{server.server_address[1]}'
+    symbols = [f'SYM{i}USDT' for i in range(SYMBOLS)]
+
+    # No pacing, both clients are compared on the transport only
+    limiter = RateLimiter(limits={}, default=10 ** 6, global_limit=10 ** 6)
+    api = BitgetClient(KEY, SECRET, PASSPHRASE, rate_limiter=limiter, base_url=base_url)
+    async_api = AsyncBitgetClient(KEY, SECRET, PASSPHRASE, rate_limiter=limiter, base_url=base_url)
+
+    sync_results = [call_sync(lambda: getattr(api, name)(params)) for name, params in CALLS]
+    sync_failed = call_sync(lambda: api._request_with_params('GET', '/fail', {}))
+    start = time.perf_counter()
+    for symbol in symbols:
+        api.tickers({'symbol': symbol, 'productType': 'USDT-FUTURES'})
+    sync_elapsed = time.perf_counter() - start
+
+    async_results, async_failed, async_elapsed = asyncio.run(run_async(async_api, symbols))
+
+    ok = all(check(name, s, a) for (name, _), s, a in zip(CALLS, sync_results, async_results))
+    ok = check('error', sync_failed, async_failed) and ok
+    ok = all(r['data']['signed'] for r in sync_results + async_results) and ok
+    print('parity', 'ok' if ok else 'FAILED')
+
+    print(f'{SYMBOLS} tickers queries, {args.delay_ms:.0f}ms server delay')
+    print(f'sync, one after the other  {sync_elapsed * 1000:8.1f}ms')
+    print(f'async, one event loop      {async_elapsed * 1000:8.1f}ms')
+    api.close()
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Ticks/sec of the per-tick candle aggregation in PriceProcessor.
+
+    python -m benchmarks.bench_candles
+
+'before' is the old DataFrame concat path, 'after' is CandleAccumulator.
+"""
+import random
+import time
+
+import pandas as pd
+
+from models.candle_accumulator import CandleAccumulator
+
+
+def make_ticks(n, seed=7):
+    rnd = random.Random(seed)
+    price = 100.0
+    ticks = []
+    for i in range(n):
+        price += rnd.uniform(-0.05, 0.05)
+        ticks.append((i, price))
+    return ticks
+
+
+def run_dataframe(ticks, ticks_per_candle):
+    df = pd.DataFrame(columns=['time', 'price'])
+    candles = []
+    for i, (ts, price) in enumerate(ticks):
+        new_data = pd.DataFrame([{'time': ts, 'price': price}])
+        if not df.empty:
+            df = pd.concat([df, new_data]).reset_index(drop=True)
+        else:
+            df = new_data
+        if (i + 1) % ticks_per_candle == 0:
+            candles.append({
+                'datetime': ts,
+                'open': df.iloc[0]['price'],
+                'high': df['price'].max(),
+                'low': df['price'].min(),
+                'close': df.iloc[-1]['price'],
+                'volume': 0,
+            })
+            df = pd.DataFrame(columns=['time', 'price'])
+    return candles
+
+
+def run_accumulator(ticks, ticks_per_candle):
+    acc = CandleAccumulator()
+    candles = []
+    for i, (ts, price) in enumerate(ticks):
+        acc.update(price)
+        if (i + 1) % ticks_per_candle == 0:
+            candles.append(acc.to_candle(ts))
+            acc.reset()
+    return candles
+
+
+def bench(fn, ticks, ticks_per_candle):
+    start = time.perf_counter()
+    candles = fn(ticks, ticks_per_candle)
+    elapsed = time.perf_counter() - start
+    return candles, len(ticks) / elapsed
+
+
+def main():
+    for ticks_per_candle in (60, 600):
+        before_ticks = make_ticks(ticks_per_candle * 5)
+        after_ticks = make_ticks(ticks_per_candle * 500)
+
+        before, before_rate = bench(run_dataframe, before_ticks, ticks_per_candle)
+        after, after_rate = bench(run_accumulator, after_ticks, ticks_per_candle)
+
+        # Both paths must agree on the candles they share
+        for a, b in zip(before, after):
+            assert (a['open'], a['high'], a['low'], a['close']) == (b['open'], b['high'], b['low'], b['close'])
+
+        print(f'{ticks_per_candle:>4} ticks/candle  before: {before_rate:>12,.0f} ticks/s  '
+              f'after: {after_rate:>12,.0f} ticks/s  x{after_rate / before_rate:,.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Per-request latency of the REST client against a local stub server.
+
+    python -m benchmarks.bench_http [--handshake-ms 20]
+
+The stub answers every request with a small JSON body over HTTP/1.1 keep-alive.
+Each new connection is delayed by --handshake-ms to stand in for the TCP+TLS
+handshake to the exchange. Compares a new connection per request (module level
+requests.get, as before) with the pooled session of bitget_c.Client.
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from apis.bitget_client import BitgetClient
+from apis.bitget_c.rate_limit import RateLimiter
+from apis.bitget_c.request_cache import RequestCache
+
+REQUESTS = 200
+BODY = json.dumps({'code': '00000', 'msg': 'success', 'data': {'serverTime': '0'}}).encode()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    handshake_ms = 0.0
+
+    def setup(self):
+        # Once per connection
+        time.sleep(self.handshake_ms / 1000)
+        super().setup()
+
+    def respond(self):
+        length = int(self.headers.get('Content-Length', 0))
+        if length:
+            self.rfile.read(length)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    do_GET = respond
+    do_POST = respond
+
+    def log_message(self, format, *args):
+        pass
+
+
+def measure(name, call):
+    call()
+    timings = []
+    for _ in range(REQUESTS):
+        start = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    print(f'{name:28s} mean {statistics.mean(timings):7.3f}ms  p50 {timings[len(timings) // 2]:7.3f}ms  '
+          f'p99 {timings[int(len(timings) * 0.99)]:7.3f}ms')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--handshake-ms', type=float, default=20.0)
+    args = parser.parse_args()
+
+    StubHandler.handshake_ms = args.handshake_ms
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{server.server_address[1]}'
+    path = '/api/v2/mix/market/tickers?productType=USDT-FUTURES'
+
+    # No pacing nor caching, only the transport is measured
+    limiter = RateLimiter(limits={}, default=10 ** 6, global_limit=10 ** 6)
+    client = BitgetClient('key', 'secret', 'passphrase', rate_limiter=limiter, base_url=base_url,
+                          request_cache=RequestCache(ttls={}))
+    client.warm_up(1)
+
+    print(f'{REQUESTS} GET requests, {args.handshake_ms:.0f}ms per new connection')
+    measure('requests.get (before)', lambda: requests.get(base_url + path))
+    measure('pooled session', lambda: client.session.get(base_url + path))
+    measure('Client._request', lambda: client._request_with_params('GET', '/api/v2/mix/market/tickers',
+                                                                   {'productType': 'USDT-FUTURES'}))
+    client.close()
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
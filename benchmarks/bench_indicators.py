@@ -0,0 +1,96 @@
+"""
+Strategy indicator benchmarks.
+
+    python -m benchmarks.bench_indicators [--full]
+
+Each vectorized indicator is checked against the row-by-row Strategy
+implementation before being timed. The row-by-row version is only timed
+on 100k rows with --full, it takes minutes there.
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from indicators import find_pivots, last_pivot_levels
+from Strategy import Strategy
+
+SIZES = (100, 1_000, 100_000)
+
+
+def make_candles(n, seed=11):
+    rnd = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rnd.normal(0, 0.5, n))
+    # Rounded prices so that equal highs/lows (ties) show up
+    high = np.round(close + rnd.uniform(0, 1, n), 1)
+    low = np.round(close - rnd.uniform(0, 1, n), 1)
+    index = pd.date_range('2024-01-01', periods=n, freq='min', name='datetime')
+    return pd.DataFrame({'open': close, 'high': high, 'low': low, 'close': close}, index=index)
+
+
+def legacy_pivots(df):
+    df = df.reset_index()
+    return df.apply(lambda row: Strategy._find_high_low(None, row.name, df), axis=1).to_numpy()
+
+
+def legacy_last_h_l(df):
+    # iterrows/df.loc loop previously used by Strategy.find_last_h_l
+    df = df.copy()
+    last_h_l = {"hh": None, "ll": None}
+    for index, row in df.iterrows():
+        if row['hh_ll'] == 1:
+            last_h_l['hh'] = row['high']
+        elif row['hh_ll'] == -1:
+            last_h_l['ll'] = row['low']
+        df.loc[index, 'hh'] = last_h_l['hh']
+        df.loc[index, 'll'] = last_h_l['ll']
+    return df['hh'].to_numpy(dtype=float), df['ll'].to_numpy(dtype=float)
+
+
+def timed(fn, *args, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn(*args)
+    return result, (time.perf_counter() - start) / repeat
+
+
+def bench_pivots(full):
+    print('pivots (hh_ll)')
+    for n in SIZES:
+        df = make_candles(n)
+        fast, fast_t = timed(find_pivots, df['high'].to_numpy(), df['low'].to_numpy(), repeat=20)
+
+        if n <= 1_000 or full:
+            slow, slow_t = timed(legacy_pivots, df)
+            assert np.array_equal(slow, fast), f'pivot mismatch at {n} rows'
+            print(f'  {n:>7} rows  apply: {slow_t * 1000:>10.2f}ms  numpy: {fast_t * 1000:>8.3f}ms  x{slow_t / fast_t:,.0f}')
+        else:
+            print(f'  {n:>7} rows  apply: {"skipped":>12}  numpy: {fast_t * 1000:>8.3f}ms')
+
+
+def bench_last_h_l(full):
+    print('last HH/LL (hh, ll)')
+    for n in SIZES:
+        df = make_candles(n)
+        df['hh_ll'] = find_pivots(df['high'].to_numpy(), df['low'].to_numpy())
+        args = (df['high'].to_numpy(), df['low'].to_numpy(), df['hh_ll'].to_numpy())
+        (hh, ll), fast_t = timed(last_pivot_levels, *args, repeat=20)
+
+        if n <= 1_000 or full:
+            (old_hh, old_ll), slow_t = timed(legacy_last_h_l, df)
+            assert np.array_equal(old_hh, hh, equal_nan=True), f'hh mismatch at {n} rows'
+            assert np.array_equal(old_ll, ll, equal_nan=True), f'll mismatch at {n} rows'
+            print(f'  {n:>7} rows  iterrows: {slow_t * 1000:>10.2f}ms  numpy: {fast_t * 1000:>8.3f}ms  x{slow_t / fast_t:,.0f}')
+        else:
+            print(f'  {n:>7} rows  iterrows: {"skipped":>12}  numpy: {fast_t * 1000:>8.3f}ms')
+
+
+def main():
+    full = '--full' in sys.argv
+    bench_pivots(full)
+    bench_last_h_l(full)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Request signing throughput, module functions against the cached Signer.
+
+    python -m benchmarks.bench_signing
+
+HMAC-SHA256 and RSA (2048-bit key generated on the fly), then the whole
+query + body + headers preparation of a GET and a POST as done by Client.
+"""
+import json
+import time
+
+from Crypto.PublicKey import RSA
+
+from apis.bitget_c import consts as c, utils
+
+SECONDS = 1.0
+PARAMS = {'symbol': 'BTCUSDT', 'productType': 'USDT-FUTURES', 'granularity': '1m',
+          'startTime': 1730000000000, 'endTime': 1730060000000, 'limit': 1000}
+
+
+def rate(fn):
+    # Calls per second over about SECONDS
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < SECONDS:
+        for _ in range(100):
+            fn()
+        count += 100
+    return count / (time.perf_counter() - start)
+
+
+def report(name, before, after):
+    print(f'{name:16s} before {before:10.0f}/s  after {after:10.0f}/s  x{after / before:.1f}')
+
+
+def legacy_prepare(method, secret, timestamp):
+    # Client._request before the Signer
+    request_path = '/api/v2/mix/market/candles'
+    if method == c.GET:
+        request_path = request_path + utils.parse_params_to_str(PARAMS)
+    body = json.dumps(PARAMS) if method == c.POST else ""
+    sign = utils.sign(utils.pre_hash(timestamp, method, request_path, str(body)), secret)
+    return utils.get_header('key', sign, timestamp, 'passphrase')
+
+
+def prepare(signer, method, timestamp):
+    request_path = '/api/v2/mix/market/candles'
+    if method == c.GET:
+        request_path = request_path + signer.query(PARAMS)
+    body = signer.body(PARAMS) if method == c.POST else ""
+    return signer.headers(timestamp, method, request_path, body)
+
+
+def main():
+    secret = 'f' * 64
+    message = utils.pre_hash(utils.get_timestamp(), c.GET, '/api/v2/mix/market/candles', '')
+    signer = utils.Signer('key', secret, 'passphrase', sign_type=c.SHA256)
+    report('hmac sign', rate(lambda: utils.sign(message, secret)), rate(lambda: signer.sign(message)))
+
+    rsa_key = RSA.generate(2048).export_key().decode()
+    rsa_signer = utils.Signer('key', rsa_key, 'passphrase', sign_type=c.RSA)
+    report('rsa sign', rate(lambda: utils.signByRSA(message, rsa_key)), rate(lambda: rsa_signer.sign(message)))
+
+    timestamp = utils.get_timestamp()
+    for method in (c.GET, c.POST):
+        report(f'{method} prepare', rate(lambda: legacy_prepare(method, secret, timestamp)),
+               rate(lambda: prepare(signer, method, timestamp)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Idle CPU and wake-up latency of strategy threads blocked on WakeQueues.
+
+    python -m benchmarks.bench_wakeup
+
+Starts 20 consumers (one Waker and three queues each, like Strategy),
+measures process CPU time while idle, then the put-to-wake latency.
+"""
+import threading
+import time
+
+from event_mux import Waker, WakeQueue
+
+CONSUMERS = 20
+IDLE_SECONDS = 2.0
+MESSAGES = 2000
+
+
+def consumer(waker, queues, stop):
+    while not stop.is_set():
+        if not waker.wait(timeout=1.0):
+            continue
+        for queue in queues:
+            while not queue.empty():
+                queue.get()
+
+
+def main():
+    stop = threading.Event()
+    wakers = [Waker() for _ in range(CONSUMERS)]
+    queues = []
+    threads = []
+    for waker in wakers:
+        own = [WakeQueue() for _ in range(3)]
+        for queue in own:
+            queue.attach(waker)
+        queues.append(own)
+        thread = threading.Thread(target=consumer, args=(waker, own, stop))
+        thread.start()
+        threads.append(thread)
+
+    cpu, wall = time.process_time(), time.perf_counter()
+    time.sleep(IDLE_SECONDS)
+    cpu, wall = time.process_time() - cpu, time.perf_counter() - wall
+    print(f'{CONSUMERS} idle consumers: {100 * cpu / wall:.2f}% of one core')
+
+    for i in range(MESSAGES):
+        queues[i % CONSUMERS][i % 3].put(i)
+        time.sleep(0.0005)
+    time.sleep(0.1)
+
+    total = sum(w.latency.total for w in wakers)
+    count = sum(w.latency.count for w in wakers)
+    worst = max(w.latency.max for w in wakers)
+    print(f'wake-up latency over {count} wakes: mean {total / count:.3f}ms, max {worst:.3f}ms')
+
+    stop.set()
+    for waker in wakers:
+        waker.notify()
+    for thread in threads:
+        thread.join()
+
+
+if __name__ == '__main__':
+    main()
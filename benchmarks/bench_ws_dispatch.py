@@ -0,0 +1,75 @@
+"""
+Websocket dispatch throughput, messages per second on one core.
+
+    python -m benchmarks.bench_ws_dispatch
+
+Feeds ticker frames for 50 symbols to the client message handler without a
+connection, then to a listener doing the PriceStreamer work up to the
+LiveStreamPrice. Before: pybitget's client (arg/data re-serialized and parsed
+in get_listener and the checksum, the listener parsing the frame again).
+After: apis.bitget_c.bitget_ws_client, one parse and a tuple key lookup.
+"""
+import json
+import time
+
+from pybitget import stream as legacy
+from apis.bitget_c import bitget_ws_client as ws
+from models.live_prices import LiveStreamPrice
+
+SYMBOLS = [f'SYM{i}USDT' for i in range(50)]
+MESSAGES = 50000
+
+
+def frame(i):
+    symbol = SYMBOLS[i % len(SYMBOLS)]
+    return json.dumps({
+        'action': 'snapshot',
+        'arg': {'instType': 'mc', 'channel': 'ticker', 'instId': symbol},
+        'data': [{'instId': symbol, 'last': '0.5164', 'bestAsk': '0.5164', 'bestBid': '0.5162',
+                  'high24h': '0.5199', 'low24h': '0.4979', 'priceChangePercent': '0.02501',
+                  'capitalRate': '0.0001', 'nextSettleTime': 1730016000000, 'systemTime': 1730002543704,
+                  'markPrice': '0.5167', 'indexPrice': '0.51703333', 'holding': '22779292.11',
+                  'baseVolume': '5080613.79', 'quoteVolume': '2603798.222648', 'openUtc': '0.5143',
+                  'chgUTC': '0.00408', 'symbolType': 1, 'symbolId': f'{symbol}_UMCBL',
+                  'deliveryPrice': '0', 'bidSz': '2621.09', 'askSz': '81.33'}],
+        'ts': 1730002543705 + i,
+    })
+
+
+def to_price(data):
+    price_data = data['data'][0]
+    return LiveStreamPrice(dict(ts=data['ts'], symbol=price_data['instId'], price=price_data['last'],
+                                ask=price_data['bestAsk'], bid=price_data['bestBid'],
+                                volume=price_data['baseVolume']))
+
+
+def measure(name, on_message, frames, received):
+    start = time.process_time()
+    for message in frames:
+        on_message(None, message)
+    elapsed = time.process_time() - start
+    assert len(received) == len(frames), f'{name}: {len(received)} of {len(frames)} routed'
+    print(f'{name:34s} {len(frames) / elapsed:10.0f} msg/s per core')
+    return len(frames) / elapsed
+
+
+def main():
+    frames = [frame(i) for i in range(MESSAGES)]
+
+    before = []
+    client = legacy.BitgetWsClient()
+    for symbol in SYMBOLS:
+        req = legacy.SubscribeReq('mc', 'ticker', symbol)
+        client._BitgetWsClient__scribe_map[req] = lambda message: before.append(to_price(json.loads(message)))
+    old = measure('before (pybitget, parse x4)', client._BitgetWsClient__on_message, frames, before)
+
+    after = []
+    client = ws.BitgetWsClient()
+    client.route([ws.SubscribeReq('mc', 'ticker', symbol) for symbol in SYMBOLS],
+                 lambda data: after.append(to_price(data)))
+    new = measure('after (parse once, tuple routing)', client._BitgetWsClient__on_message, frames, after)
+    print(f'x{new / old:.1f}')
+
+
+if __name__ == '__main__':
+    main()
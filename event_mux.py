@@ -0,0 +1,52 @@
+import threading
+import time
+from queue import Queue
+from models.latency_stats import LatencyStats
+
+
+class Waker:
+    """
+    Wakes a single consumer thread when any of the queues attached to it receives
+    an item, or when notify() is called directly (e.g. on shutdown).
+    Records the time between the first notify and the consumer waking up.
+    """
+
+    def __init__(self, name='wake-up latency'):
+        self.cond = threading.Condition()
+        self.pending = False
+        self.signalled_at = 0.0
+        self.latency = LatencyStats(name)
+
+    def notify(self):
+        with self.cond:
+            if not self.pending:
+                self.pending = True
+                self.signalled_at = time.perf_counter()
+                self.cond.notify()
+
+    def wait(self, timeout=None):
+        # Returns True if woken by a notify, False on timeout
+        with self.cond:
+            if not self.pending:
+                self.cond.wait(timeout)
+            if not self.pending:
+                return False
+            self.latency.record((time.perf_counter() - self.signalled_at) * 1000)
+            self.pending = False
+            return True
+
+
+class WakeQueue(Queue):
+    """Queue that notifies its attached Wakers on every put."""
+
+    def __init__(self, maxsize=0):
+        super().__init__(maxsize)
+        self.wakers = []
+
+    def attach(self, waker: Waker):
+        self.wakers.append(waker)
+
+    def _put(self, item):
+        super()._put(item)
+        for waker in self.wakers:
+            waker.notify()
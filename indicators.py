@@ -0,0 +1,75 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+PIVOT_H = 1
+PIVOT_L = -1
+PIVOT_WINDOW = 5
+
+
+def find_pivots(high, low, window=PIVOT_WINDOW):
+    """
+    Vectorized version of Strategy._find_high_low over a whole frame.
+    A candle is a pivot high (1) when its high is the max of the 2*window+1 candles
+    centred on it, a pivot low (-1) when its low is the min, 0 when both or neither.
+    The first and last `window` candles are always 0.
+    """
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    n = len(high)
+    pivots = np.zeros(n, dtype=np.int64)
+    size = 2 * window + 1
+    if n < size:
+        return pivots
+
+    centre = slice(window, n - window)
+    is_high = high[centre] >= sliding_window_view(high, size).max(axis=1)
+    is_low = low[centre] <= sliding_window_view(low, size).min(axis=1)
+
+    pivots[centre] = np.where(is_high & ~is_low, PIVOT_H, np.where(is_low & ~is_high, PIVOT_L, 0))
+    return pivots
+
+
+def forward_fill(values):
+    # Propagate the last non-NaN value forward, leading NaNs point at row 0 and stay NaN
+    values = np.asarray(values, dtype=float)
+    index = np.where(~np.isnan(values), np.arange(len(values)), 0)
+    np.maximum.accumulate(index, out=index)
+    return values[index]
+
+
+def last_pivot_levels(high, low, pivots):
+    """
+    Columnar version of Strategy.find_last_h_l: for every row, the high of the last
+    pivot high and the low of the last pivot low at or before it (NaN before the first one).
+    """
+    pivots = np.asarray(pivots)
+    hh = forward_fill(np.where(pivots == PIVOT_H, high, np.nan))
+    ll = forward_fill(np.where(pivots == PIVOT_L, low, np.nan))
+    return hh, ll
+
+
+class IncrementalPivots:
+    """
+    Pivot and last HH/LL state carried from candle to candle.
+    When a candle is appended only the candle `window` rows back becomes decidable,
+    so each append looks at the last 2*window+1 candles only, whatever the history length.
+    """
+
+    def __init__(self, window=PIVOT_WINDOW):
+        self.window = window
+        self.last_hh = np.nan
+        self.last_ll = np.nan
+
+    def seed(self, last_hh, last_ll):
+        # State after a full computation, i.e. the hh/ll of the last row
+        self.last_hh = last_hh
+        self.last_ll = last_ll
+
+    def append(self, high_tail, low_tail):
+        # high_tail/low_tail: the last 2*window+1 highs and lows, new candle included
+        pivot = find_pivots(high_tail, low_tail, self.window)[self.window]
+        if pivot == PIVOT_H:
+            self.last_hh = high_tail[self.window]
+        elif pivot == PIVOT_L:
+            self.last_ll = low_tail[self.window]
+        return pivot
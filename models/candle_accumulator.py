@@ -0,0 +1,78 @@
+class CandleAccumulator:
+    """
+    Running OHLCV state for a single candle.
+    Every update is O(1) and the memory used does not depend on the number of ticks.
+    """
+    __slots__ = ('start', 'open', 'high', 'low', 'close', 'volume', 'ticks')
+
+    def __init__(self, start=None):
+        self.reset(start)
+
+    def reset(self, start=None):
+        self.start = start
+        self.open = None
+        self.high = None
+        self.low = None
+        self.close = None
+        self.volume = 0.0
+        self.ticks = 0
+
+    def is_empty(self):
+        return self.ticks == 0
+
+    def has_price(self):
+        # False only for a candle that got no ticks and was not forward-filled
+        return self.open is not None
+
+    def fill(self, price):
+        # Flat candle for a period without ticks
+        self.open = price
+        self.high = price
+        self.low = price
+        self.close = price
+
+    def update(self, price, volume=0.0):
+        if self.ticks == 0:
+            self.open = price
+            self.high = price
+            self.low = price
+        else:
+            if price > self.high:
+                self.high = price
+            if price < self.low:
+                self.low = price
+        self.close = price
+        self.volume += volume
+        self.ticks += 1
+
+    def merge(self, other):
+        # Fold a finished lower timeframe candle into this one
+        if not other.has_price():
+            return
+        if not self.has_price():
+            self.open = other.open
+            self.high = other.high
+            self.low = other.low
+        else:
+            if other.high > self.high:
+                self.high = other.high
+            if other.low < self.low:
+                self.low = other.low
+        self.close = other.close
+        self.volume += other.volume
+        self.ticks += other.ticks
+
+    def to_candle(self, candle_time):
+        # Same shape as the candle dicts consumed by Strategy.update_df
+        return {
+            'datetime': candle_time,
+            'open': self.open,
+            'high': self.high,
+            'low': self.low,
+            'close': self.close,
+            'volume': self.volume,
+        }
+
+    def __repr__(self):
+        return (f"CandleAccumulator(start={self.start}, open={self.open}, high={self.high}, "
+                f"low={self.low}, close={self.close}, volume={self.volume}, ticks={self.ticks})")
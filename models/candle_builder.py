@@ -0,0 +1,126 @@
+import datetime as dt
+import pytz
+
+from models.candle_accumulator import CandleAccumulator
+
+# Candle length in minutes
+GRANULARITIES = {
+    '1m': 1,
+    '5m': 5,
+    '15m': 15,
+    '30m': 30,
+    '1h': 60,
+    '4h': 240
+}
+
+# Granularity names expected by the v2 REST candles endpoints
+REST_GRANULARITIES = {
+    '1h': '1H',
+    '4h': '4H'
+}
+
+MINUTE_MS = 60 * 1000
+
+
+def granularity_ms(granularity):
+    return GRANULARITIES[granularity] * MINUTE_MS
+
+
+def rest_granularity(granularity):
+    return REST_GRANULARITIES.get(granularity, granularity)
+
+
+def floor_time(ts_ms, length_ms):
+    return ts_ms - ts_ms % length_ms
+
+
+def ms_to_datetime(ts_ms):
+    return dt.datetime.fromtimestamp(ts_ms / 1000, tz=pytz.timezone('UTC'))
+
+
+class CandleBuilder:
+    """
+    Builds candles for several timeframes of one symbol from a single tick stream.
+    Ticks are aggregated once into candles of the smallest timeframe, every closed
+    base candle is then folded into the higher timeframes.
+    Candles are closed either by a tick of a later bucket (add_tick) or by the
+    candle scheduler at the bucket boundary (close_until).
+    Closed candles are returned as (granularity, candle) tuples, lowest timeframe first.
+    Buckets that began before the first tick are only partly covered and never emitted.
+    """
+
+    def __init__(self, granularities, forward_fill=True):
+        self.granularities = sorted(set(granularities), key=lambda g: GRANULARITIES[g])
+        self.base = self.granularities[0]
+        self.base_ms = granularity_ms(self.base)
+        for g in self.granularities[1:]:
+            if granularity_ms(g) % self.base_ms != 0:
+                raise ValueError(f'Granularity {g} is not a multiple of {self.base}')
+
+        # Periods without ticks are emitted as flat candles at the last close
+        self.forward_fill = forward_fill
+        self.last_close = None
+        self.late_ticks = 0
+        # Time of the first tick, earlier buckets are incomplete
+        self.started = None
+
+        self.current = CandleAccumulator()
+        self.rollups = {g: CandleAccumulator() for g in self.granularities[1:]}
+
+    def add_tick(self, ts_ms, price, volume=0.0):
+        closed = []
+        start = floor_time(ts_ms, self.base_ms)
+        if self.current.start is None:
+            self.started = ts_ms
+            self.current.reset(start)
+        elif start > self.current.start:
+            closed = self._roll_to(start)
+        elif start < self.current.start:
+            # The candle of this tick was already closed at its boundary
+            self.late_ticks += 1
+            return closed
+        self.current.update(price, volume)
+        return closed
+
+    def close_until(self, now_ms):
+        # Close every base candle that ended at or before now_ms
+        if self.current.start is None:
+            return []
+        start = floor_time(now_ms, self.base_ms)
+        if start > self.current.start:
+            return self._roll_to(start)
+        return []
+
+    def _roll_to(self, start):
+        closed = []
+        while self.current.start < start:
+            closed.extend(self._close_base())
+            self.current.reset(self.current.start + self.base_ms)
+        return closed
+
+    def _close_base(self):
+        closed = []
+        base = self.current
+        if base.is_empty() and self.forward_fill and self.last_close is not None:
+            base.fill(self.last_close)
+        if base.has_price():
+            if base.start >= self.started:
+                closed.append((self.base, base.to_candle(ms_to_datetime(base.start))))
+            self.last_close = base.close
+
+        base_end = base.start + self.base_ms
+        for g, rollup in self.rollups.items():
+            length = granularity_ms(g)
+            bucket = floor_time(base.start, length)
+            if rollup.start != bucket:
+                # Higher timeframe started mid-bucket or was left open, close what we have
+                if rollup.has_price() and rollup.start >= self.started:
+                    closed.append((g, rollup.to_candle(ms_to_datetime(rollup.start))))
+                rollup.reset(bucket)
+
+            rollup.merge(base)
+            if base_end == bucket + length:
+                if rollup.has_price() and rollup.start >= self.started:
+                    closed.append((g, rollup.to_candle(ms_to_datetime(rollup.start))))
+                rollup.reset()
+        return closed
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+
+OHLCV_COLUMNS = {'open': np.float64, 'high': np.float64, 'low': np.float64, 'close': np.float64, 'volume': np.float64}
+INDICATOR_COLUMNS = {'hh_ll': np.int64, 'hh': np.float64, 'll': np.float64}
+
+
+class CandleStore:
+    """
+    Fixed-capacity candle window backed by preallocated NumPy arrays.
+    Each column has room for 2*capacity rows and candles are written one after the
+    other; when the end is reached the last capacity-1 rows are moved to the front.
+    Appends are amortized O(1), memory stays flat and the last n rows of any column
+    are always a contiguous, writable view (no copy).
+    Times are epoch milliseconds of the candle open.
+    """
+
+    def __init__(self, capacity=100, columns=None):
+        self.capacity = capacity
+        self.dtypes = dict(OHLCV_COLUMNS)
+        self.dtypes.update(INDICATOR_COLUMNS if columns is None else columns)
+
+        self.time = np.zeros(2 * capacity, dtype=np.int64)
+        self.data = {name: np.zeros(2 * capacity, dtype=dtype) for name, dtype in self.dtypes.items()}
+        self.end = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def last_time(self):
+        return int(self.time[self.end - 1]) if self.size else None
+
+    def _compact(self):
+        keep = self.capacity - 1
+        start = self.end - keep
+        self.time[:keep] = self.time[start:self.end]
+        for column in self.data.values():
+            column[:keep] = column[start:self.end]
+        self.end = keep
+
+    def _write(self, index, ts_ms, values):
+        self.time[index] = ts_ms
+        for name, column in self.data.items():
+            value = values.get(name)
+            if value is None:
+                column[index] = np.nan if column.dtype.kind == 'f' else 0
+            else:
+                column[index] = value
+
+    def append(self, ts_ms, values):
+        if self.end == len(self.time):
+            self._compact()
+        self._write(self.end, ts_ms, values)
+        self.end += 1
+        self.size = min(self.size + 1, self.capacity)
+
+    def replace_last(self, ts_ms, values):
+        self._write(self.end - 1, ts_ms, values)
+
+    def load(self, times, columns):
+        # Bulk fill from arrays sorted by time, only the last `capacity` rows are kept
+        times = np.asarray(times, dtype=np.int64)[-self.capacity:]
+        n = len(times)
+        self.time[:n] = times
+        for name, column in self.data.items():
+            if name in columns:
+                column[:n] = np.asarray(columns[name])[-self.capacity:]
+            else:
+                column[:n] = np.nan if column.dtype.kind == 'f' else 0
+        self.end = n
+        self.size = n
+
+    def times(self, n=None):
+        n = self.size if n is None else min(n, self.size)
+        return self.time[self.end - n:self.end]
+
+    def view(self, name, n=None):
+        n = self.size if n is None else min(n, self.size)
+        return self.data[name][self.end - n:self.end]
+
+    def to_frame(self, n=None):
+        # Copies into a DataFrame, only for logging or callers that want pandas
+        index = pd.to_datetime(self.times(n), unit='ms', utc=True).rename('datetime')
+        return pd.DataFrame({name: self.view(name, n).copy() for name in self.data}, index=index)
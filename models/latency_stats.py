@@ -0,0 +1,39 @@
+from collections import deque
+
+
+class LatencyStats:
+    """
+    Running count/mean/max of a latency measured in milliseconds.
+    With a window, the last `window` samples are kept for percentiles.
+    """
+
+    def __init__(self, name, window=0):
+        self.name = name
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+        self.recent = deque(maxlen=window) if window else None
+
+    def record(self, value_ms):
+        self.count += 1
+        self.total += value_ms
+        self.last = value_ms
+        if value_ms > self.max:
+            self.max = value_ms
+        if self.recent is not None:
+            self.recent.append(value_ms)
+
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, q):
+        # Over the recent window, None without samples
+        if not self.recent:
+            return None
+        samples = sorted(self.recent)
+        return samples[min(len(samples) - 1, int(len(samples) * q / 100))]
+
+    def __repr__(self):
+        return (f"{self.name}: count={self.count}, last={self.last:.1f}ms, "
+                f"mean={self.mean():.1f}ms, max={self.max:.1f}ms")
@@ -0,0 +1,25 @@
+class PlanOrder:
+    """One of our trigger orders as tracked locally, keyed by clientOid."""
+    __slots__ = ('client_oid', 'order_id', 'symbol', 'side', 'trigger_price', 'status')
+
+    # Sent, not acknowledged yet / resting on the exchange / gone
+    NEW = 'new'
+    LIVE = 'live'
+    TRIGGERED = 'triggered'
+    CANCELLED = 'cancelled'
+    FAILED = 'failed'
+
+    def __init__(self, client_oid, symbol, side, trigger_price, order_id=None, status=NEW):
+        self.client_oid = client_oid
+        self.order_id = order_id
+        self.symbol = symbol
+        self.side = side
+        self.trigger_price = float(trigger_price)
+        self.status = status
+
+    def is_working(self):
+        return self.status in (self.NEW, self.LIVE)
+
+    def __repr__(self):
+        return (f"PlanOrder(client_oid={self.client_oid}, order_id={self.order_id}, symbol={self.symbol}, "
+                f"side={self.side}, trigger_price={self.trigger_price}, status={self.status})")
@@ -0,0 +1,13 @@
+class Quantizer:
+    """Rounds a value to the nearest multiple of `step`, shown with `places` decimals."""
+    __slots__ = ('places', 'step')
+
+    def __init__(self, places, step):
+        self.places = int(places)
+        self.step = float(step)
+
+    def __call__(self, value):
+        return round(round(value / self.step) * self.step, self.places)
+
+    def __repr__(self):
+        return f'Quantizer(places={self.places}, step={self.step})'
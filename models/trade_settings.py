@@ -3,12 +3,18 @@
 class TradeSettings:
     def __init__(self, ob):
         self.granularity= str(ob['granularity'])
+        # Extra timeframes built from the same tick stream, the trading granularity is always included
+        self.granularities= list(dict.fromkeys([self.granularity] + [str(g) for g in ob.get('granularities', [])]))
         self.risk= float(ob['risk'])
         self.dist = float(ob['dist'])
         self.sl_pct= float(ob['sl_pct'])
         self.tp_pct= float(ob['tp_pct'])
         self.trailing_sl_trigger_pct= float(ob['trailing_sl_trigger_pct'])
         self.trailing_sl_pct= float(ob['trailing_sl_pct'])
+        # Number of candles kept per pair by Strategy
+        self.candle_window= int(ob.get('candle_window', 100))
+        # Update hh_ll/hh/ll from the tail only instead of the whole window on each candle
+        self.incremental_indicators= bool(ob.get('incremental_indicators', True))
 
     def __repr__(self):
         return str(vars(self))
@@ -0,0 +1,65 @@
+import threading
+
+
+class SpscRingBuffer:
+    """
+    Bounded single-producer/single-consumer ring buffer.
+    Only the producer moves head and only the consumer moves tail, so no lock is
+    needed between them. When the buffer is full the new item is dropped and counted.
+    """
+
+    def __init__(self, capacity=4096):
+        self.capacity = capacity
+        self.buffer = [None] * capacity
+        self.head = 0
+        self.tail = 0
+        self.event = threading.Event()
+
+        # Producer side counters
+        self.dropped = 0
+        self.overflows = 0
+        self.high_water = 0
+        self._full = False
+
+    def __len__(self):
+        return self.head - self.tail
+
+    def push(self, item):
+        size = self.head - self.tail
+        if size >= self.capacity:
+            self.dropped += 1
+            if not self._full:
+                self.overflows += 1
+                self._full = True
+            return False
+
+        self.buffer[self.head % self.capacity] = item
+        self.head += 1
+        self._full = False
+        if size + 1 > self.high_water:
+            self.high_water = size + 1
+        self.event.set()
+        return True
+
+    def pop(self):
+        if self.tail == self.head:
+            return None
+        index = self.tail % self.capacity
+        item = self.buffer[index]
+        self.buffer[index] = None
+        self.tail += 1
+        return item
+
+    def wait(self, timeout=None):
+        return self.event.wait(timeout)
+
+    def drain(self):
+        # Clear before reading so a push racing with the drain wakes the next wait
+        self.event.clear()
+        items = []
+        while self.tail != self.head:
+            items.append(self.pop())
+        return items
+
+    def stats(self):
+        return f'size={len(self)}, high_water={self.high_water}, dropped={self.dropped}, overflows={self.overflows}'